@@ -0,0 +1,82 @@
+"""Counts failed terminal attempts with and without first-character dispatch.
+
+Run with `python -m bench.backtracking`. The "ordered choice" numbers come
+from temporarily swapping expr_paren_terminal and query_terminal back to
+the alternations they replaced.
+"""
+from collections import Counter
+
+from parsy import Parser, alt
+
+import src.parsing.expr as expr_module
+import src.parsing.query as query_module
+from src.parsing.statements import stmt_sequence
+
+programs = {
+    "aggregates": """SELECT e.course_id, COUNT(e.student_id), MAX(e.grade) AS best
+        FROM enrolled AS e
+        GROUP BY e.course_id
+        HAVING MIN(e.grade) < 50 AND AVG(e.grade) = 70""",
+    "strings": """SELECT CONCAT(s.name, "!"), SUBSTR(s.name, 0, 3)
+        FROM student AS s WHERE s.name = "x" AND true""",
+    "nested": """SELECT c.x FROM (SELECT c.x FROM (SELECT c.x FROM c))
+        UNION (SELECT d.x FROM d) INTERSECT e""",
+    "long_and": "SELECT t.a FROM t WHERE " +
+        " AND ".join(f"t.c{i} < {i} + t.d * 2" for i in range(100)),
+}
+
+
+def counted(parser: Parser, counter: Counter) -> Parser:
+    @Parser
+    def counted_parser(stream, index):
+        result = parser(stream, index)
+        counter["attempts"] += 1
+        if not result.status:
+            counter["failures"] += 1
+        return result
+    return counted_parser
+
+
+def count_ordered_choice(program: str) -> Counter:
+    counter: Counter = Counter()
+    expr_terminals = expr_module.expr_terminals
+    query_terminals = query_module.query_terminals
+    dispatch = (expr_module.expr_paren_terminal, query_module.query_terminal)
+    expr_module.expr_paren_terminal = alt(*(counted(expr_terminals[kind], counter) for kind in [
+        "column", "int", "bool", "varchar", "concat", "substr", "agg", "paren"]))
+    query_module.query_terminal = alt(*(counted(query_terminals[kind], counter) for kind in [
+        "table", "select", "paren"]))
+    try:
+        stmt_sequence.parse(program)
+    finally:
+        expr_module.expr_paren_terminal, query_module.query_terminal = dispatch
+    return counter
+
+
+def count_dispatch(program: str) -> Counter:
+    counter: Counter = Counter()
+    expr_terminals = dict(expr_module.expr_terminals)
+    query_terminals = dict(query_module.query_terminals)
+    for table in (expr_module.expr_terminals, query_module.query_terminals):
+        for kind, parser in table.items():
+            table[kind] = counted(parser, counter)
+    try:
+        stmt_sequence.parse(program)
+    finally:
+        expr_module.expr_terminals.update(expr_terminals)
+        query_module.query_terminals.update(query_terminals)
+    return counter
+
+
+def main():
+    print(f"{'program':<12}{'ordered choice':>24}{'dispatch':>24}")
+    print(f"{'':<12}{'attempts':>12}{'failures':>12}{'attempts':>12}{'failures':>12}")
+    for name, program in programs.items():
+        before = count_ordered_choice(program)
+        after = count_dispatch(program)
+        print(f"{name:<12}{before['attempts']:>12}{before['failures']:>12}"
+              f"{after['attempts']:>12}{after['failures']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compares loading a catalog by parsing its DDL with opening it from a
+catalog file and looking up a handful of tables.
+
+Run with `python -m bench.catalog_file [table count]`.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from src.parsing.statements import stmt_sequence
+from src.types.catalog import open_catalog, write_catalog
+from src.types.symbol_table import SymbolTable
+
+column_count = 20
+lookup_count = 10
+
+
+def ddl(table_count: int) -> str:
+    columns = ", ".join(f"c{i} INT" for i in range(column_count))
+    return ";\n".join(f"CREATE TABLE t{i} ({columns})" for i in range(table_count))
+
+
+def main():
+    table_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    sql = ddl(table_count)
+    names = [f"t{i * table_count // lookup_count}" for i in range(lookup_count)]
+
+    start = time.perf_counter()
+    st = SymbolTable()
+    stmt_sequence.parse(sql).type_check(st)
+    schemas = [st[name] for name in names]
+    parse_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog")
+        start = time.perf_counter()
+        write_catalog(path, st)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        catalog = open_catalog(path)
+        assert [catalog[name] for name in names] == schemas
+        open_seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+        catalog.data.buffer.close()
+
+    print(f"{table_count} tables of {column_count} columns, {lookup_count} lookups")
+    print(f"parse DDL        {parse_seconds * 1e3:>10.1f} ms")
+    print(f"write catalog    {write_seconds * 1e3:>10.1f} ms ({size / 1e6:.1f} MB)")
+    print(f"open and look up {open_seconds * 1e3:>10.3f} ms "
+          f"({parse_seconds / open_seconds:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
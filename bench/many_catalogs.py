@@ -0,0 +1,59 @@
+"""Compares checking one view against many tenant catalogs one at a time
+and with type_check_many.
+
+Run with `python -m bench.many_catalogs`. The tenants are spread over a
+handful of schema variants, each loaded as its own Schema objects.
+"""
+import time
+
+from bench.workloads import large_group_by
+from src.parsing.many import type_check_many
+from src.parsing.statements import StmtQuery, stmt_sequence
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, Schema
+
+tenant_count = 2000
+
+
+def tenant_catalogs(base: SymbolTable, variant_count: int):
+    catalogs = []
+    for tenant in range(tenant_count):
+        variant = tenant % variant_count
+        st = SymbolTable()
+        for table, schema in base.items():
+            fields = dict(schema.fields.items())
+            # Variant v adds v extra columns
+            for i in range(variant):
+                fields[f"extra{i}"] = BaseType.VARCHAR
+            st[table] = Schema(fields)
+        catalogs.append(st)
+    return catalogs
+
+
+def main():
+    stmts = stmt_sequence.parse(large_group_by(50)).stmts
+    view = stmts[-1]
+    assert isinstance(view, StmtQuery)
+    base = SymbolTable()
+    for stmt in stmts[:-1]:
+        stmt.type_check(base)
+
+    print(f"{'variants':>9}{'one at a time ms':>18}{'type_check_many ms':>20}{'speedup':>9}")
+    for variant_count in [1, 10, 100, tenant_count]:
+        catalogs = tenant_catalogs(base, variant_count)
+        start = time.perf_counter()
+        expected = [view.type_check(st) for st in catalogs]
+        one_at_a_time = time.perf_counter() - start
+
+        catalogs = tenant_catalogs(base, variant_count)
+        start = time.perf_counter()
+        results = type_check_many(view.query, catalogs)
+        many = time.perf_counter() - start
+        assert [r.result for r in results] == expected
+
+        print(f"{variant_count:>9}{one_at_a_time * 1e3:>18.1f}{many * 1e3:>20.1f}"
+              f"{one_at_a_time / many:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
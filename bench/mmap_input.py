@@ -0,0 +1,65 @@
+"""Compares peak RSS of type checking a large file through f.read() and
+through an mmap of the file.
+
+Run with `python -m bench.mmap_input [megabytes]`. Each path is run in a
+fresh interpreter so its peak RSS is not affected by the other.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# stmt_sequence does not accept anything after the final statement, so the
+# separators come first
+statement_template = ";\nSELECT t.c0, t.c1 FROM t WHERE t.c0 = {} AND t.c1 < t.c2"
+
+
+def write_program(path: str, size: int):
+    with open(path, "w") as f:
+        f.write("CREATE TABLE t (c0 INT, c1 INT, c2 INT)")
+        written = 0
+        i = 0
+        while written < size:
+            statement = statement_template.format(i)
+            f.write(statement)
+            written += len(statement)
+            i += 1
+
+
+def run(mode: str, path: str):
+    from src.parsing.statements import stmt_sequence, type_check_stmts
+    from src.parsing.stream import iter_buffer_statements, map_file
+    from src.types.symbol_table import SymbolTable
+
+    start = time.perf_counter()
+    if mode == "read":
+        with open(path) as f:
+            stmt_sequence.parse(f.read()).type_check(SymbolTable())
+    else:
+        with map_file(path) as buffer:
+            type_check_stmts(iter_buffer_statements(buffer), SymbolTable())
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:>6}{elapsed:>12.2f}{peak_rss / 1024:>14.1f}")
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "program.sql")
+        write_program(path, int(megabytes * (1 << 20)))
+        print(f"{os.path.getsize(path) / (1 << 20):.1f} MB input")
+        print(f"{'mode':>6}{'seconds':>12}{'peak RSS MB':>14}")
+        for mode in ["read", "mmap"]:
+            subprocess.run([sys.executable, "-m", "bench.mmap_input",
+                            "--run", mode, path], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,43 @@
+"""Times parsing a large program serially and with parse_parallel.
+
+Run with `python -m bench.parallel_parse [statements]`.
+"""
+import os
+import sys
+import time
+
+from src.parsing.parallel import parse_parallel
+from src.parsing.statements import stmt_sequence
+
+
+def program(statement_count: int) -> str:
+    statements = ["CREATE TABLE t (c0 INT, c1 INT, c2 VARCHAR)"]
+    for i in range(statement_count):
+        statements.append(
+            f"SELECT t.c0 + {i} AS x, CONCAT(t.c2, \"{i}\") FROM t "
+            f"WHERE t.c0 < {i} AND t.c1 = t.c0 * 2 AND NOT t.c2 = \"x\"")
+    return ";\n".join(statements)
+
+
+def main():
+    statement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    sql = program(statement_count)
+    start = time.perf_counter()
+    expected = stmt_sequence.parse(sql)
+    serial = time.perf_counter() - start
+    print(f"{len(sql) / (1 << 20):.1f} MB, {statement_count} statements")
+    print(f"{'jobs':>6}{'seconds':>10}{'speedup':>10}")
+    print(f"{'serial':>6}{serial:>10.2f}{1:>9.2f}x")
+    jobs = 1
+    # At least one run goes through the pool, to show its overhead
+    while jobs <= max(2, os.cpu_count() or 1):
+        start = time.perf_counter()
+        result = parse_parallel(sql, jobs)
+        elapsed = time.perf_counter() - start
+        assert result == expected
+        print(f"{jobs:>6}{elapsed:>10.2f}{serial / elapsed:>9.2f}x")
+        jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
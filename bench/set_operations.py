@@ -0,0 +1,35 @@
+"""Times type checking of deeply nested UNION/INTERSECT trees.
+
+Run with `python -m bench.set_operations`. Every level nests the previous
+tree as its first branch, which used to be checked twice per level, so the
+time should now grow linearly with the depth.
+"""
+import time
+
+from src.parsing.query import Query, QueryIntersect, QueryTable, QueryUnion
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, Schema
+
+
+def nested_set_operations(depth: int) -> Query:
+    query: Query = QueryTable("a")
+    for level in range(depth):
+        set_operation = QueryUnion if level % 2 == 0 else QueryIntersect
+        query = set_operation([query, QueryTable("b")])
+    return query
+
+
+def main():
+    schema = Schema({f"c{i}": BaseType.INT for i in range(10)})
+    st = SymbolTable({"a": schema, "b": schema})
+    print(f"{'depth':>6}{'seconds':>12}{'us/level':>12}")
+    for depth in [10, 20, 40, 80, 160, 320]:
+        query = nested_set_operations(depth)
+        start = time.perf_counter()
+        query.type_check(st)
+        elapsed = time.perf_counter() - start
+        print(f"{depth:>6}{elapsed:>12.5f}{elapsed / depth * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
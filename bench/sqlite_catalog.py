@@ -0,0 +1,45 @@
+"""Compares loading a catalog by parsing its DDL with reading the same
+tables from a SQLite database.
+
+Run with `python -m bench.sqlite_catalog [table count]`.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from bench.catalog_file import column_count, ddl
+from src.parsing.statements import stmt_sequence
+from src.types.sqlite_catalog import load_sqlite_catalog
+from src.types.symbol_table import SymbolTable
+
+
+def main():
+    table_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sql = ddl(table_count)
+
+    start = time.perf_counter()
+    st = SymbolTable()
+    stmt_sequence.parse(sql).type_check(st)
+    parse_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schema.db")
+        connection = sqlite3.connect(path)
+        connection.executescript(sql)
+        connection.close()
+
+        start = time.perf_counter()
+        loaded = load_sqlite_catalog(path)
+        load_seconds = time.perf_counter() - start
+    assert dict(loaded) == dict(st)
+
+    print(f"{table_count} tables of {column_count} columns")
+    print(f"parse DDL    {parse_seconds * 1e3:>10.1f} ms")
+    print(f"load SQLite  {load_seconds * 1e3:>10.1f} ms "
+          f"({parse_seconds / load_seconds:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
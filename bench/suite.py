@@ -0,0 +1,126 @@
+"""Times parsing and type checking of the synthetic workloads.
+
+Run with `python -m bench.suite --output results.json`. Parsing and type
+checking are timed separately, each as the best of --repeat runs, and
+peak memory of one parse plus type check is measured with tracemalloc.
+Pass --compare with an earlier results file to print the speedup of
+every measurement.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from bench.workloads import workloads
+from src.parsing.statements import stmt_sequence
+from src.types.symbol_table import SymbolTable
+
+# Parsing and type checking both recurse on the nesting of the AST, so
+# nested_select and and_chain stay below the recursion limit
+sizes: Dict[str, List[int]] = {
+    "wide_create_table": [10, 100, 1000],
+    "nested_select": [2, 8, 16],
+    "and_chain": [10, 100, 400],
+    "wide_union": [10, 100, 400],
+    "many_way_join": [4, 16, 64],
+    "large_group_by": [10, 100, 400],
+}
+
+
+def best_time(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(program: str, repeat: int) -> Dict[str, float]:
+    statements = stmt_sequence.parse(program)
+    parse_seconds = best_time(lambda: stmt_sequence.parse(program), repeat)
+    type_check_seconds = best_time(
+        lambda: statements.type_check(SymbolTable()), repeat)
+
+    tracemalloc.start()
+    stmt_sequence.parse(program).type_check(SymbolTable())
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "parse_seconds": parse_seconds,
+        "parse_ops_per_second": 1 / parse_seconds,
+        "type_check_seconds": type_check_seconds,
+        "type_check_ops_per_second": 1 / type_check_seconds,
+        "peak_memory_bytes": peak_bytes,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(selected: List[str], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "workloads": {},
+    }
+    for name in selected:
+        results["workloads"][name] = {}
+        for size in sizes[name]:
+            measurement = measure(workloads[name](size), repeat)
+            results["workloads"][name][str(size)] = measurement
+            print(f"{name:<20}{size:>6}"
+                  f"{measurement['parse_ops_per_second']:>14.1f}"
+                  f"{measurement['type_check_ops_per_second']:>14.1f}"
+                  f"{measurement['peak_memory_bytes'] / 1024:>12.0f}", flush=True)
+    return results
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Any]):
+    """Prints how many times faster each measurement is than in baseline"""
+    print(f"\nspeedup over {baseline['revision'][:12]}")
+    print(f"{'workload':<20}{'size':>6}{'parse':>14}{'type check':>14}")
+    for name, by_size in results["workloads"].items():
+        for size, measurement in by_size.items():
+            old = baseline["workloads"].get(name, {}).get(size)
+            if old is None:
+                continue
+            print(f"{name:<20}{size:>6}"
+                  f"{old['parse_seconds'] / measurement['parse_seconds']:>13.2f}x"
+                  f"{old['type_check_seconds'] / measurement['type_check_seconds']:>13.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("workloads", nargs="*",
+                        help=f"workloads to run, all by default: {', '.join(workloads)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="results of an earlier run to compare against")
+    args = parser.parse_args()
+    for name in args.workloads:
+        if name not in workloads:
+            parser.error(f"unknown workload {name}")
+
+    print(f"{'workload':<20}{'size':>6}{'parse ops/s':>14}{'check ops/s':>14}{'peak KiB':>12}")
+    results = run(args.workloads or list(workloads), args.repeat)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Synthetic programs for the benchmark suite.
+
+Every generator takes a size and returns a complete program, with the
+CREATE TABLE statements it needs, that type checks without errors.
+"""
+from typing import Callable, Dict
+
+
+def columns_ddl(table: str, count: int, prefix: str = "c") -> str:
+    columns = ", ".join(f"{prefix}{i} INT" for i in range(count))
+    return f"CREATE TABLE {table} ({columns})"
+
+
+def wide_create_table(size: int) -> str:
+    """One CREATE TABLE with size columns"""
+    return columns_ddl("t", size)
+
+
+def nested_select(size: int) -> str:
+    """size SELECTs, each selecting from the one inside it"""
+    query = "t"
+    for i in range(size):
+        query = f"(SELECT t.c0, t.c1 FROM {query} WHERE t.c0 < {i})"
+    return f"{columns_ddl('t', 2)};\nSELECT t.c0 FROM {query}"
+
+
+def and_chain(size: int) -> str:
+    """A WHERE clause of size comparisons joined by AND"""
+    conditions = " AND ".join(f"t.c{i % 8} < {i} + t.c0 * 2" for i in range(size))
+    return f"{columns_ddl('t', 8)};\nSELECT t.c0 FROM t WHERE {conditions}"
+
+
+def wide_union(size: int) -> str:
+    """size SELECT branches combined with UNION"""
+    branches = " UNION ".join(
+        f"(SELECT t.c0, t.c1 FROM t WHERE t.c0 = {i})" for i in range(size))
+    return f"{columns_ddl('t', 2)};\n{branches}"
+
+
+def many_way_join(size: int) -> str:
+    """size tables joined in a chain, each on the previous join's key"""
+    ddl = ";\n".join(
+        f"CREATE TABLE t{i} (k{i} INT, v{i} INT)" for i in range(size))
+    query = "t0"
+    previous = "t0"
+    for i in range(1, size):
+        query = f"{query} JOIN t{i} ON {previous}.k{i - 1} = t{i}.k{i} AS j{i}"
+        previous = f"j{i}"
+    return f"{ddl};\nSELECT {previous}.v0 FROM {query}"
+
+
+def large_group_by(size: int) -> str:
+    """size grouped columns and an aggregate"""
+    columns = ", ".join(f"t.c{i}" for i in range(size))
+    return (f"{columns_ddl('t', size + 1)};\n"
+            f"SELECT {columns}, COUNT(t.c{size}) FROM t GROUP BY {columns}")
+
+
+workloads: Dict[str, Callable[[int], str]] = {
+    "wide_create_table": wide_create_table,
+    "nested_select": nested_select,
+    "and_chain": and_chain,
+    "wide_union": wide_union,
+    "many_way_join": many_way_join,
+    "large_group_by": large_group_by,
+}
@@ -1,17 +1,205 @@
+import argparse
+import os
+import signal
 import sys
 
-from src.parsing.statements import stmt_sequence
-from src.types import symbol_table
+# The parser modules are imported where they are used, so that --connect
+# starts without loading them
 
 
-def main(filename):
+def open_start_catalog(catalog_path):
+    from src.types.symbol_table import SymbolTable
+
+    if catalog_path is None:
+        return SymbolTable()
+    from src.types.catalog import open_any_catalog
+    return open_any_catalog(catalog_path)
+
+
+def main(filename, cache_path=None, profile=False, parse_jobs=None, check_jobs=None,
+         catalog_path=None, all_errors=False):
+    from src.parsing.cache import ParseCache
+    from src.parsing.statements import type_check_stmts
+    from src.parsing.stream import iter_buffer_statements, map_file
+
+    if check_jobs is not None:
+        from src.schedule import type_check_parallel
+
+        def check(statements, st):
+            # The workers open the catalog themselves
+            return type_check_parallel(statements, st, check_jobs, catalog_path)
+    elif not profile:
+        check = type_check_stmts
+    else:
+        from src.profiling import Profiler
+
+        def check(statements, st):
+            with Profiler() as profiler:
+                try:
+                    return profiler.type_check(statements, st)
+                finally:
+                    print(profiler.report(), file=sys.stderr)
+
+    if all_errors:
+        with open(filename) as f:
+            cache = ParseCache(path=cache_path)
+            statements, errors = cache.parse_recovering(f.read())
+            cache.save()
+        for error in errors:
+            print(f"{filename}: {error}", file=sys.stderr)
+        if errors:
+            sys.exit(1)
+        print(check(statements.stmts, open_start_catalog(catalog_path)))
+        return
+    if parse_jobs is not None:
+        from src.parsing.parallel import parse_parallel
+
+        with open(filename) as f:
+            statements = parse_parallel(f.read(), parse_jobs)
+        print(check(statements.stmts, open_start_catalog(catalog_path)))
+        return
+    if cache_path is None:
+        # The file is mapped rather than read, so only the statement being
+        # parsed is ever decoded into a str
+        with map_file(filename) as buffer:
+            print(check(iter_buffer_statements(buffer), open_start_catalog(catalog_path)))
+        return
     with open(filename) as f:
-        statements = stmt_sequence.parse(f.read())
-        print(statements.type_check(symbol_table.SymbolTable()))
+        cache = ParseCache(path=cache_path)
+        statements = cache.parse(f.read())
+        cache.save()
+    print(check(statements.stmts, open_start_catalog(catalog_path)))
+
+
+def batch(paths, jobs, schema_filenames, catalog_path=None):
+    from src.batch import check_files, expand_paths, load_catalog
+
+    catalog = load_catalog(schema_filenames, open_start_catalog(catalog_path))
+    failed = False
+    for file_result in check_files(expand_paths(paths), catalog, jobs, catalog_path):
+        print(file_result, flush=True)
+        failed = failed or file_result.error is not None
+    if failed:
+        sys.exit(1)
+
+
+def build_catalog(catalog_path, schema_filenames):
+    from src.batch import load_catalog
+    from src.types.catalog import write_catalog
+
+    write_catalog(catalog_path, load_catalog(schema_filenames))
+
+
+def references(index_path, paths, names, impact_filenames):
+    from src.batch import expand_paths
+    from src.parsing.references import ReferenceIndex
+    from src.parsing.statements import StmtCreateTable
+
+    index = ReferenceIndex(path=index_path)
+    for filename in list(index.files):
+        if not os.path.exists(filename):
+            index.remove_file(filename)
+    for filename in expand_paths(paths):
+        index.add_file(filename)
+    index.save()
+    for filename, error in index.parse_errors.items():
+        print(f"{filename}: skipped unparsable statements: {error}", file=sys.stderr)
+
+    for name in names:
+        table, _, column = name.partition(".")
+        if column:
+            locations = index.column_references(table, column)
+        else:
+            locations = index.table_references(table)
+        for location in sorted(locations):
+            print(f"{name}: {location}")
+    for impact_filename in impact_filenames:
+        with open(impact_filename) as f:
+            statements = index.cache.parse(f.read())
+        for statement in statements.stmts:
+            if isinstance(statement, StmtCreateTable):
+                for location in sorted(index.impact(statement)):
+                    print(f"{statement.table_name}: {location}")
+
+
+def serve(schema_filenames, socket_path=None, cache_path=None, catalog_path=None):
+    from src.parsing.cache import ParseCache
+    from src.server import TypeCheckServer
+
+    server = TypeCheckServer(open_start_catalog(catalog_path), ParseCache(path=cache_path))
+    for schema_filename in schema_filenames:
+        with open(schema_filename) as f:
+            server.load(f.read())
+    # Make SIGTERM unwind normally so the parse cache is saved
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        if socket_path is None:
+            server.serve_lines(sys.stdin, sys.stdout)
+        else:
+            server.serve_unix(socket_path)
+    finally:
+        server.cache.save()
+
+
+def connect(socket_path, filename):
+    from src.client import check_file, response_result
+
+    response = check_file(socket_path, filename)
+    if not response["ok"]:
+        print(f"{response['error']}: {response['message']}", file=sys.stderr)
+        sys.exit(1)
+    print(response_result(response))
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print(f"usage: {sys.argv[0]} <sql filename>")
-        sys.exit(0)
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filenames", nargs="*", metavar="filename",
+                        help="sql filename, directory or glob pattern")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="reuse parsed statements stored in FILE across runs")
+    parser.add_argument("--serve", action="store_true",
+                        help="answer JSON-lines requests on stdin, or on --socket")
+    parser.add_argument("--schema", metavar="FILE", action="append", default=[],
+                        help="with --serve or --jobs, DDL to load into the catalog first")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="with --serve, listen on the Unix socket PATH")
+    parser.add_argument("--connect", metavar="PATH",
+                        help="type check filename with the server at PATH")
+    parser.add_argument("--jobs", metavar="N", type=int,
+                        help="check many files with N worker processes")
+    parser.add_argument("--parse-jobs", metavar="N", type=int,
+                        help="parse a single large file with N worker processes")
+    parser.add_argument("--check-jobs", metavar="N", type=int,
+                        help="type check the queries of a single file with N worker processes")
+    parser.add_argument("--catalog", metavar="FILE",
+                        help="start from the tables in FILE, a catalog built by --build-catalog "
+                        "or a SQLite database")
+    parser.add_argument("--build-catalog", metavar="FILE",
+                        help="write the tables defined by the given DDL files to the catalog FILE")
+    parser.add_argument("--index", metavar="FILE",
+                        help="update the reference index in FILE with the given files")
+    parser.add_argument("--refs", metavar="TABLE[.COLUMN]", action="append", default=[],
+                        help="with --index, list the statements referencing a table or column")
+    parser.add_argument("--impact", metavar="FILE", action="append", default=[],
+                        help="with --index, list the statements a change to the CREATE TABLEs in FILE may affect")
+    parser.add_argument("--all-errors", action="store_true",
+                        help="report every syntax error of the file, not just the first")
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-statement and per-phase timings to stderr")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.schema, args.socket, args.cache, args.catalog)
+    elif args.index is not None:
+        references(args.index, args.filenames, args.refs, args.impact)
+    elif not args.filenames:
+        parser.error("the following arguments are required: filename")
+    elif args.build_catalog is not None:
+        build_catalog(args.build_catalog, args.filenames)
+    elif args.jobs is not None or len(args.filenames) > 1 or os.path.isdir(args.filenames[0]):
+        batch(args.filenames, args.jobs or 1, args.schema, args.catalog)
+    elif args.connect is not None:
+        connect(args.connect, args.filenames[0])
+    else:
+        main(args.filenames[0], args.cache, args.profile, args.parse_jobs,
+             args.check_jobs, args.catalog, args.all_errors)
@@ -0,0 +1,110 @@
+"""Type checks many files, fanning them out to a process pool.
+
+Every worker receives the base catalog once, when it starts, and checks
+each of its files in a child scope of it. A catalog file is opened by each
+worker rather than sent, so that its tables are still decoded on demand.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import glob
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.parsing.cache import ParseCache
+from src.parsing.statements import StmtSequence
+from src.types.catalog import open_any_catalog
+from src.types.symbol_table import SymbolTable
+from src.types.types import Schema
+
+
+@dataclass
+class FileResult():
+    filename: str
+    result: Optional[Tuple[str, Schema]] = None
+    error: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"{self.filename}: {self.error}"
+        return f"{self.filename}: {self.result}"
+
+
+def expand_paths(paths: Iterable[str]) -> List[str]:
+    """Replaces directories with the .sql files below them and expands glob
+    patterns, keeping the order the paths were given in"""
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(glob.glob(
+                os.path.join(path, "**", "*.sql"), recursive=True)))
+        elif glob.has_magic(path):
+            filenames.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+# Statements shared between files, such as common DDL, are parsed once per
+# process
+_parse_cache = ParseCache()
+
+
+def parse_file(filename: str) -> StmtSequence:
+    """Parses filename like main.py does, accepting whitespace after the
+    final ';'"""
+    with open(filename) as f:
+        return _parse_cache.parse(f.read())
+
+
+def load_catalog(schema_filenames: Iterable[str], base: Optional[SymbolTable] = None) -> Dict[str, Schema]:
+    """The tables schema_filenames define, checked on top of the tables of
+    base if it is given"""
+    st = SymbolTable(parent=base)
+    for schema_filename in schema_filenames:
+        parse_file(schema_filename).type_check(st)
+    return dict(st.data)
+
+
+def base_catalog(catalog: Dict[str, Schema], catalog_path: Optional[str] = None) -> SymbolTable:
+    """catalog, on top of the tables of the catalog file at catalog_path"""
+    if catalog_path is None:
+        return SymbolTable(catalog)
+    return SymbolTable(catalog, open_any_catalog(catalog_path))
+
+
+_worker_catalog = SymbolTable()
+
+
+def _init_worker(catalog: Dict[str, Schema], catalog_path: Optional[str]):
+    global _worker_catalog
+    _worker_catalog = base_catalog(catalog, catalog_path)
+
+
+def check_file(filename: str, catalog: Optional[SymbolTable] = None) -> FileResult:
+    if catalog is None:
+        catalog = _worker_catalog
+    try:
+        statements = parse_file(filename)
+        return FileResult(filename, statements.type_check(catalog.child()))
+    except Exception as e:
+        return FileResult(filename, error=f"{type(e).__name__}: {e}")
+
+
+def check_files(filenames: List[str], catalog: Dict[str, Schema], jobs: int = 1,
+                catalog_path: Optional[str] = None) -> Iterator[FileResult]:
+    """Checks filenames against catalog on top of the catalog file at
+    catalog_path, if there is one. Yields each file's result as soon as it
+    is checked, so with more than one job the results are not in the order
+    of filenames"""
+    if jobs <= 1:
+        catalog_st = base_catalog(catalog, catalog_path)
+        for filename in filenames:
+            yield check_file(filename, catalog_st)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(catalog, catalog_path)) as executor:
+        futures = [executor.submit(check_file, filename)
+                   for filename in filenames]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,28 @@
+"""Thin client for src.server, kept free of the parser imports so that
+starting it is cheap"""
+import json
+import socket
+from typing import Any, Dict, List, Tuple
+
+from src.types.types import BaseType, Schema
+
+
+def send_requests(socket_path: str, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall("".join(json.dumps(request) + "\n"
+                             for request in requests).encode())
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("r") as f:
+            return [json.loads(line) for line in f]
+
+
+def check_file(socket_path: str, filename: str) -> Dict[str, Any]:
+    with open(filename) as f:
+        return send_requests(socket_path, [{"sql": f.read()}])[0]
+
+
+def response_result(response: Dict[str, Any]) -> Tuple[str, Schema]:
+    """Rebuilds the (table name, schema) pair that type_check returned"""
+    return response["table"], Schema({field: BaseType(base_type)
+                                      for field, base_type in response["schema"].items()})
@@ -1,7 +1,16 @@
-__all__ = ["bool_expr", "data_structures", "expr",
-           "int_expr", "query", "statements", "terminals"]
+__all__ = ["bool_expr", "cache", "compiled", "data_structures", "expr",
+           "incremental", "int_expr", "lexer", "many", "parallel", "query",
+           "references", "split", "statements", "stream", "terminals",
+           "token_grammar"]
 
 from src.parsing.statements import stmt_sequence, StmtSequence
 
-def parse_sql_program(sql: str) -> StmtSequence:
+def parse_sql_program(sql: str, lexer: str = "parsy") -> StmtSequence:
+    """Parses sql with the character-level grammar, or with lexer="fast"
+    tokenizes it in a single pass and parses the token stream instead"""
+    if lexer == "fast":
+        from src.parsing.token_grammar import parse_tokens
+        return parse_tokens(sql)
+    if lexer != "parsy":
+        raise ValueError(f"Unknown lexer {lexer}")
     return stmt_sequence.parse(sql)
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from parsy import ParseError
+from src.parsing.split import stripped_statements
+from src.parsing.statements import Stmt, StmtSequence, stmt
+
+# Bumped whenever the AST classes change shape or how they are unpickled, so
+# stale cache files are ignored
+CACHE_FORMAT_VERSION = 2
+
+
+def statement_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+class ParseCache():
+    """Content-addressed cache of parsed statements.
+
+    Statements are keyed by a hash of their text, so unchanged statements
+    are never re-parsed, wherever they appear in the input. The cache keeps
+    at most max_size statements, evicting the least recently used, and is
+    loaded from and saved to path if one is given.
+    """
+
+    def __init__(self, max_size: int = 4096, path: Optional[str] = None):
+        self.max_size = max_size
+        self.path = path
+        self.entries: OrderedDict[bytes, Stmt] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def parse_statement(self, text: str) -> Stmt:
+        """Parses a single statement with no surrounding whitespace"""
+        key = statement_key(text)
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        parsed = stmt.parse(text)
+        self.entries[key] = parsed
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return parsed
+
+    def iter_parse(self, sql: str) -> Iterator[Union[Stmt, ParseError]]:
+        """Yields each statement of sql parsed, or its ParseError positioned
+        in the whole of sql"""
+        for offset, stripped in stripped_statements(sql):
+            try:
+                yield self.parse_statement(stripped)
+            except ParseError as e:
+                yield ParseError(e.expected, sql, offset + e.index)
+
+    def parse(self, sql: str) -> StmtSequence:
+        """Parses sql like stmt_sequence, reusing cached statements"""
+        stmts = []
+        for result in self.iter_parse(sql):
+            if isinstance(result, ParseError):
+                raise result
+            stmts.append(result)
+        return StmtSequence(stmts)
+
+    def parse_recovering(self, sql: str) -> Tuple[StmtSequence, List[ParseError]]:
+        """Parses sql, skipping to the next ';' after a syntax error. Returns
+        the statements that parsed and the errors, in input order."""
+        stmts = []
+        errors = []
+        for result in self.iter_parse(sql):
+            if isinstance(result, ParseError):
+                errors.append(result)
+            else:
+                stmts.append(result)
+        return StmtSequence(stmts), errors
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                version, entries = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            # A missing or corrupt cache file just means a cold start
+            return
+        if version != CACHE_FORMAT_VERSION:
+            return
+        for key, parsed in entries.items():
+            self.entries[key] = parsed
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if self.path is None:
+            return
+        entries: Dict[bytes, Stmt] = dict(self.entries)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump((CACHE_FORMAT_VERSION, entries),
+                        f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,415 @@
+"""Type checking by interpreting a flat instruction list.
+
+compile_query and compile_expr lower an AST once into post-order
+instructions, with every distinct column reference given a slot. The
+resulting program can then be type checked against any number of symbol
+tables without walking the tree again: a loop pops and pushes
+(inputs, output) pairs on a stack, each slot is looked up at most once per
+run, and aggregation checks, which do not depend on the catalog, are done
+at compile time.
+
+Results and errors, including which error is raised first, are the same as
+the type_check methods of the AST.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.parsing.expr import (AggOp, BinaryOp, Expr, ExprAgg, ExprBinaryOp,
+                              ExprBoolLiteral, ExprColumn, ExprConcat,
+                              ExprIntLiteral, ExprNot, ExprSubstr,
+                              ExprVarcharLiteral)
+from src.parsing.query import (Query, QueryJoin, QuerySelect,
+                               QuerySetOperation, QueryTable)
+from src.types.symbol_table import SymbolTable
+from src.types.types import (AggregationMismatchError, AggregationStatus,
+                             BaseType, Expression, RedefinedNameError, Schema,
+                             TypeCheckingError, TypeMismatchError,
+                             qualified_name)
+
+# Expression opcodes
+COLUMN = 0
+LITERAL = 1
+# Raises unless the output on top of the stack is the argument
+EXPECT = 2
+ARITHMETIC = 3
+AND = 4
+EQUALS = 5
+LESS_THAN = 6
+CONCAT = 7
+SUBSTR = 8
+MIN_MAX = 9
+AVG = 10
+COUNT = 11
+# Falls back to the node's own type_check
+EXPR = 12
+
+# Query opcodes
+TABLE = 0
+JOIN = 1
+SELECT = 2
+# Compares the top branch of a set operation with its first branch
+SET_BRANCH = 3
+SET_MERGE = 4
+QUERY = 5
+
+Instruction = Tuple[int, Any]
+Tables = Mapping[str, Schema]
+
+_empty_schema = Schema({})
+# Input schema of each (table, column, type) reference. Sharing them across
+# runs lets their Schema.simplify results be reused too.
+_column_schemas: Dict[Tuple[str, str, BaseType], Schema] = {}
+
+
+def column_schema(table: str, col: str, col_type: BaseType) -> Schema:
+    key = (table, col, col_type)
+    schema = _column_schemas.get(key)
+    if schema is None:
+        schema = Schema.from_unique((qualified_name(table, col),), (col_type,))
+        _column_schemas[key] = schema
+    return schema
+
+
+@dataclass
+class ExprProgram():
+    instructions: List[Instruction] = field(default_factory=list)
+    # (table, column) referenced by each slot
+    columns: List[Tuple[str, str]] = field(default_factory=list)
+
+    def type_check(self, st: SymbolTable) -> Expression:
+        """Same as type_check of the compiled Expr"""
+        inputs, output = self.run(st)
+        return Expression(inputs, output)
+
+    def run(self, tables: Tables) -> Tuple[Schema, BaseType]:
+        resolved: List[Optional[Tuple[Schema, BaseType]]] = [None] * len(self.columns)
+        stack: List[Tuple[Schema, BaseType]] = []
+        push = stack.append
+        pop = stack.pop
+        concat = Schema.concat
+        for op, arg in self.instructions:
+            if op == COLUMN:
+                entry = resolved[arg]
+                if entry is None:
+                    table, col = self.columns[arg]
+                    col_type = tables[table].fields[col]
+                    entry = (column_schema(table, col, col_type), col_type)
+                    resolved[arg] = entry
+                push(entry)
+            elif op == EXPECT:
+                inputs, output = stack[-1]
+                if output != arg:
+                    raise TypeMismatchError(arg, Expression(inputs, output))
+            elif op == LITERAL:
+                push((_empty_schema, arg))
+            elif op <= LESS_THAN:
+                right_inputs, right_output = pop()
+                left_inputs, left_output = pop()
+                inputs = concat(left_inputs, right_inputs)
+                if op == AND or op == ARITHMETIC:
+                    want = BaseType.BOOL if op == AND else BaseType.INT
+                    if left_output != want:
+                        raise TypeMismatchError(want, Expression(left_inputs, left_output))
+                    if right_output != want:
+                        raise TypeMismatchError(want, Expression(right_inputs, right_output))
+                    push((inputs, want))
+                    continue
+                if op == LESS_THAN and left_output != BaseType.INT and left_output != BaseType.VARCHAR:
+                    raise TypeCheckingError(
+                        f"Cannot apply operator {BinaryOp.LESS_THAN} to type "
+                        f"{Expression(left_inputs, left_output)}")
+                if left_output != right_output:
+                    raise TypeMismatchError(left_output, right_output)
+                push((inputs, BaseType.BOOL))
+            elif op == CONCAT:
+                right_inputs, _ = pop()
+                left_inputs, _ = pop()
+                push((concat(left_inputs, right_inputs), BaseType.VARCHAR))
+            elif op == SUBSTR:
+                end_inputs, _ = pop()
+                start_inputs, _ = pop()
+                input_inputs, _ = pop()
+                push((concat(concat(input_inputs, start_inputs), end_inputs),
+                      BaseType.VARCHAR))
+            elif op == MIN_MAX:
+                if stack[-1][1] == BaseType.BOOL:
+                    raise TypeMismatchError(BaseType.INT, BaseType.BOOL)
+            elif op == AVG:
+                output = stack[-1][1]
+                if output != BaseType.INT:
+                    raise TypeMismatchError(BaseType.INT, output)
+            elif op == COUNT:
+                push((pop()[0], BaseType.INT))
+            else:
+                expression = arg.type_check(tables)
+                push((expression.inputs, expression.output))
+        return stack[-1]
+
+
+class _ExprCompiler():
+    def __init__(self):
+        self.program = ExprProgram()
+        self.slots: Dict[Tuple[str, str], int] = {}
+
+    def emit(self, op: int, arg: Any = None):
+        self.program.instructions.append((op, arg))
+
+    def compile(self, node: Expr):
+        # Checks on a child are emitted right after it, so they fail before
+        # later children are looked at, as in the recursive type_check
+        if isinstance(node, ExprColumn):
+            slot = self.slots.get(node.table_column_name)
+            if slot is None:
+                slot = len(self.program.columns)
+                self.slots[node.table_column_name] = slot
+                self.program.columns.append(node.table_column_name)
+            self.emit(COLUMN, slot)
+        elif isinstance(node, ExprIntLiteral):
+            self.emit(LITERAL, BaseType.INT)
+        elif isinstance(node, ExprBoolLiteral):
+            self.emit(LITERAL, BaseType.BOOL)
+        elif isinstance(node, ExprVarcharLiteral):
+            self.emit(LITERAL, BaseType.VARCHAR)
+        elif isinstance(node, ExprBinaryOp) and node.op in binary_opcodes:
+            self.compile(node.left)
+            self.compile(node.right)
+            self.emit(binary_opcodes[node.op])
+        elif isinstance(node, ExprConcat):
+            self.compile(node.left)
+            self.emit(EXPECT, BaseType.VARCHAR)
+            self.compile(node.right)
+            self.emit(EXPECT, BaseType.VARCHAR)
+            self.emit(CONCAT)
+        elif isinstance(node, ExprSubstr):
+            self.compile(node.input)
+            self.emit(EXPECT, BaseType.VARCHAR)
+            self.compile(node.start)
+            self.emit(EXPECT, BaseType.INT)
+            self.compile(node.end)
+            self.emit(EXPECT, BaseType.INT)
+            self.emit(SUBSTR)
+        elif isinstance(node, ExprNot):
+            # NOT passes its operand's type through
+            self.compile(node.node)
+            self.emit(EXPECT, BaseType.BOOL)
+        elif isinstance(node, ExprAgg) and node.op in agg_opcodes:
+            self.compile(node.node)
+            self.emit(agg_opcodes[node.op])
+        else:
+            self.emit(EXPR, node)
+
+
+binary_opcodes = {
+    BinaryOp.ADDITION: ARITHMETIC,
+    BinaryOp.MULTIPLICATION: ARITHMETIC,
+    BinaryOp.AND: AND,
+    BinaryOp.EQUALS: EQUALS,
+    BinaryOp.LESS_THAN: LESS_THAN,
+}
+
+agg_opcodes = {
+    AggOp.MIN: MIN_MAX,
+    AggOp.MAX: MIN_MAX,
+    AggOp.AVG: AVG,
+    AggOp.COUNT: COUNT,
+}
+
+
+def compile_expr(node: Expr) -> ExprProgram:
+    compiler = _ExprCompiler()
+    compiler.compile(node)
+    return compiler.program
+
+
+def _raise(error: Optional[BaseException]):
+    if error is not None:
+        # The stored error is raised on every run, so drop the traceback of
+        # the previous one
+        raise error.with_traceback(None)
+
+
+@dataclass
+class SelectStep():
+    """Everything a SELECT does after its FROM query has been checked"""
+    # Output name, or the error getting it raises, and program of each
+    # select expression
+    select_list: List[Tuple[Optional[str], Optional[Exception], ExprProgram]]
+    condition: Optional[ExprProgram]
+    groupby: Optional[List[ExprProgram]]
+    having: Optional[ExprProgram]
+    # Outcomes of the aggregation checks, in the order they are made
+    select_aggregation_error: Optional[Exception] = None
+    having_aggregation_error: Optional[Exception] = None
+    where_aggregation_error: Optional[Exception] = None
+
+    @classmethod
+    def from_query(cls, query: QuerySelect) -> "SelectStep":
+        select_list: List[Tuple[Optional[str], Optional[Exception], ExprProgram]] = []
+        for select_expr in query.select_list:
+            try:
+                select_list.append(
+                    (select_expr.get_name(), None, compile_expr(select_expr.expr)))
+            except NotImplementedError as e:
+                select_list.append((None, e, compile_expr(select_expr.expr)))
+        step = cls(
+            select_list,
+            compile_expr(query.condition) if query.condition is not None else None,
+            [compile_expr(expr) for expr in query.groupby_exprs]
+            if query.groupby_exprs is not None else None,
+            compile_expr(query.having_condition)
+            if query.groupby_exprs is not None and query.having_condition is not None else None)
+        if query.groupby_exprs is None:
+            return step
+
+        groupby_exprs = set(query.groupby_exprs)
+        try:
+            for select_expr in query.select_list:
+                if select_expr.expr.aggregation_status(groupby_exprs) == AggregationStatus.NOT_AGGREGATED:
+                    raise AggregationMismatchError(
+                        f'Select expression {select_expr.expr} is not aggregated')
+        except TypeCheckingError as e:
+            step.select_aggregation_error = e
+        if query.having_condition is not None:
+            try:
+                if query.having_condition.aggregation_status(groupby_exprs) == AggregationStatus.NOT_AGGREGATED:
+                    raise AggregationMismatchError(
+                        f'Having condition {query.having_condition} is not aggregated')
+            except TypeCheckingError as e:
+                step.having_aggregation_error = e
+        if query.condition is not None:
+            try:
+                if query.condition.aggregation_status(groupby_exprs) == AggregationStatus.AGGREGATED:
+                    raise AggregationMismatchError(
+                        f'Where condition {query.condition} is aggregated')
+            except TypeCheckingError as e:
+                step.where_aggregation_error = e
+        return step
+
+    def run(self, from_name: str, from_schema: Schema) -> Tuple[str, Schema]:
+        output_schema_fields: Dict[str, BaseType] = {}
+        from_schema_expanded = from_schema.expand(from_name)
+        select_tables = {from_name: from_schema}
+        for name, name_error, program in self.select_list:
+            inputs, output = program.run(select_tables)
+            if not from_schema_expanded.is_subtype(inputs):
+                raise TypeMismatchError(from_schema_expanded, inputs)
+            _raise(name_error)
+            # There is a name whenever getting it did not raise
+            assert name is not None
+            output_schema_fields[name] = output
+
+        internal_schema = Schema.concat(from_schema, Schema(output_schema_fields))
+        internal_tables = {from_name: internal_schema}
+        if self.condition is not None:
+            inputs, output = self.condition.run(internal_tables)
+            if not internal_schema.is_subtype(inputs.simplify()):
+                raise TypeMismatchError(internal_schema, inputs.simplify())
+            if output != BaseType.BOOL:
+                raise TypeMismatchError(BaseType.BOOL, output)
+
+        if self.groupby is not None:
+            for program in self.groupby:
+                inputs, _ = program.run(internal_tables)
+                if not internal_schema.is_subtype(inputs.simplify()):
+                    raise TypeMismatchError(internal_schema, inputs.simplify())
+            _raise(self.select_aggregation_error)
+            if self.having is not None:
+                inputs, _ = self.having.run(internal_tables)
+                if not internal_schema.is_subtype(inputs.simplify()):
+                    raise TypeMismatchError(internal_schema, inputs.simplify())
+                _raise(self.having_aggregation_error)
+            _raise(self.where_aggregation_error)
+
+        return (from_name, Schema(output_schema_fields))
+
+
+@dataclass
+class QueryProgram():
+    instructions: List[Instruction] = field(default_factory=list)
+    # Catalog tables the program looks up, in order of first use
+    tables: List[str] = field(default_factory=list)
+    # Whether the result depends on which other names are in the catalog,
+    # through alias checks or fresh set operation names
+    uses_names: bool = False
+    # Whether the program falls back to type_check of an AST node, which
+    # may use the catalog in any way
+    opaque: bool = False
+
+    def type_check(self, st: SymbolTable) -> Tuple[str, Schema]:
+        """Same as type_check of the compiled Query"""
+        stack: List[Tuple[str, Schema]] = []
+        for op, arg in self.instructions:
+            if op == TABLE:
+                table_name, output_table_name = arg
+                schema = st[table_name]
+                if output_table_name is None:
+                    stack.append((table_name, schema))
+                    continue
+                if output_table_name in st:
+                    raise RedefinedNameError(output_table_name)
+                stack.append((output_table_name, schema))
+            elif op == SELECT:
+                from_name, from_schema = stack.pop()
+                stack.append(arg.run(from_name, from_schema))
+            elif op == JOIN:
+                condition, output_name = arg
+                right_table_name, right_schema = stack.pop()
+                left_table_name, left_schema = stack.pop()
+                concat_schema = Schema.concat(
+                    left_schema.expand(left_table_name),
+                    right_schema.expand(right_table_name), keep_all=True)
+                inputs, output = condition.run(
+                    {left_table_name: left_schema, right_table_name: right_schema})
+                if output != BaseType.BOOL:
+                    raise TypeMismatchError(BaseType.BOOL, output)
+                if not concat_schema.is_subtype(inputs):
+                    raise TypeMismatchError(concat_schema, inputs)
+                stack.append((output_name, concat_schema.simplify()))
+            elif op == SET_BRANCH:
+                first_schema = stack[-1 - arg][1]
+                schema = stack[-1][1]
+                if not Schema.equals(first_schema, schema):
+                    raise TypeMismatchError(first_schema, schema)
+            elif op == SET_MERGE:
+                branches = stack[-arg:]
+                del stack[-arg:]
+                full_name = "".join(
+                    from_name[0] + from_name[-1] + "_" for from_name, _ in branches)
+                final_schema = Schema.merge_all([schema for _, schema in branches])
+                stack.append((st.fresh_name(full_name.strip("_")), final_schema))
+            else:
+                stack.append(arg.type_check(st))
+        return stack[-1]
+
+
+def _compile_query(node: Query, program: QueryProgram):
+    emit = program.instructions.append
+    if isinstance(node, QueryTable):
+        emit((TABLE, (node.table_name, node.output_table_name)))
+        if node.table_name not in program.tables:
+            program.tables.append(node.table_name)
+        if node.output_table_name is not None:
+            program.uses_names = True
+    elif isinstance(node, QuerySelect):
+        _compile_query(node.from_query, program)
+        emit((SELECT, SelectStep.from_query(node)))
+    elif isinstance(node, QueryJoin):
+        _compile_query(node.left, program)
+        _compile_query(node.right, program)
+        emit((JOIN, (compile_expr(node.condition), node.output_name)))
+    elif isinstance(node, QuerySetOperation):
+        for i, query in enumerate(node.queries):
+            _compile_query(query, program)
+            if i > 0:
+                emit((SET_BRANCH, i))
+        emit((SET_MERGE, len(node.queries)))
+        program.uses_names = True
+    else:
+        emit((QUERY, node))
+        program.opaque = True
+
+
+def compile_query(node: Query) -> QueryProgram:
+    program = QueryProgram()
+    _compile_query(node, program)
+    return program
@@ -1,27 +1,73 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import MISSING, dataclass, fields
 from enum import Enum
-from typing import List, Tuple
-
-from parsy import generate, string, whitespace
-from src.parsing.terminals import (bool_literal, c_name, int_literal, lparen,
-                                   padding, rparen, string_ignore_case,
-                                   varchar_literal)
+import re
+from typing import Any, Collection, Dict, List, MutableMapping, Optional, Tuple
+from weakref import WeakValueDictionary
+
+from parsy import Parser, Result, generate, regex, string, whitespace
+from src.parsing.terminals import (bool_literal, c_name, int_literal,
+                                   keywords, lparen, padding, rparen,
+                                   string_ignore_case, varchar_literal,
+                                   word_pattern)
 from src.types.symbol_table import SymbolTable
-from src.types.types import AggregationMismatchError, AggregationStatus, BaseType, Expression, Schema, TypeCheckingError, TypeMismatchError
-
-
-@dataclass
-class Expr():
+from src.types.types import AggregationMismatchError, AggregationStatus, BaseType, Expression, Schema, TypeCheckingError, TypeMismatchError, qualified_name
+
+
+# Canonical node for each (class, field values), see HashConsed
+_expr_nodes: MutableMapping[Tuple, Expr] = WeakValueDictionary()
+
+
+class HashConsed(type):
+    """Metaclass that hash-conses Expr nodes.
+
+    Constructing a node whose class and field values match a live node
+    returns that node instead of a new one. Since children are canonical
+    too, structurally equal expressions are always the same object, so
+    equality and hashing are by identity and common subexpressions are
+    stored once.
+    """
+
+    def __call__(cls, *args, **kwargs):
+        if kwargs or len(args) != len(cls.__dataclass_fields__):
+            args = cls.field_values(args, kwargs)
+        key = (cls, args)
+        node = _expr_nodes.get(key)
+        if node is None:
+            node = super().__call__(*args)
+            _expr_nodes[key] = node
+        return node
+
+    def field_values(cls, args: Tuple, kwargs: Dict[str, Any]) -> Tuple:
+        values = list(args)
+        for field in fields(cls)[len(args):]:
+            if field.name in kwargs:
+                values.append(kwargs.pop(field.name))
+            elif field.default is not MISSING:
+                values.append(field.default)
+            else:
+                raise TypeError(f"{cls.__name__} missing argument {field.name}")
+        if kwargs:
+            raise TypeError(f"{cls.__name__} got unexpected arguments {list(kwargs)}")
+        return tuple(values)
+
+
+@dataclass(eq=False, frozen=True)
+class Expr(metaclass=HashConsed):
     # Class is here instead of expr.py to avoid circular import
 
+    def __reduce__(self):
+        # Unpickled and copied nodes are hash-consed like new ones
+        return (type(self), tuple(getattr(self, field.name) for field in fields(self)))
+
     def type_check(self, st: SymbolTable) -> Expression:
         raise NotImplementedError(f"TODO: write typing rule for {type(self)}")
 
     def get_name(self) -> str:
         raise NotImplementedError(f"TODO: write get_name() for {type(self)}")
 
-    def aggregation_status(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
+        # Expressions are hash-consed, so with a set this is a hash lookup
         if self in group_by_exprs:
             if isinstance(self, ExprColumn):
                 return AggregationStatus.EITHER
@@ -29,33 +75,34 @@ class Expr():
 
         return self.aggregation_status_internal(group_by_exprs)
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         raise NotImplementedError(
             f"TODO: write aggregation_status_internal() for {type(self)}")
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprColumn(Expr):
     table_column_name: Tuple[str, str]
 
     def type_check(self, st: SymbolTable) -> Expression:
         table, col = self.table_column_name
         table_schema = st[table]
+        col_type = table_schema.fields[col]
 
         return Expression(
-            Schema({f"{table}.{col}": table_schema.fields[col]}),
-            table_schema.fields[col]
+            Schema.from_unique((qualified_name(table, col),), (col_type,)),
+            col_type
         )
 
     def get_name(self) -> str:
         return self.table_column_name[1]
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         # If the column was aggregated it would have been caught in aggregation_status
         return AggregationStatus.NOT_AGGREGATED
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprIntLiteral(Expr):
     value: int
 
@@ -68,12 +115,12 @@ class ExprIntLiteral(Expr):
     def get_name(self) -> str:
         return str(self.value)
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         # Literals can always be viewed as an aggregation
         return AggregationStatus.EITHER
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprBoolLiteral(Expr):
     value: bool
 
@@ -86,12 +133,12 @@ class ExprBoolLiteral(Expr):
     def get_name(self) -> str:
         return str(self.value).lower()
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         # Literals can always be viewed as an aggregation
         return AggregationStatus.EITHER
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprVarcharLiteral(Expr):
     value: str
 
@@ -104,12 +151,12 @@ class ExprVarcharLiteral(Expr):
     def get_name(self) -> str:
         return self.value
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         # Literals can always be viewed as an aggregation
         return AggregationStatus.EITHER
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprConcat(Expr):
     left: Expr
     right: Expr
@@ -129,14 +176,14 @@ class ExprConcat(Expr):
     def get_name(self) -> str:
         return f'{self.left.get_name()}_{self.right.get_name()}'
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         return AggregationStatus.combine(
             self.left.aggregation_status(group_by_exprs),
             self.right.aggregation_status(group_by_exprs)
         )
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprSubstr(Expr):
     input: Expr
     start: Expr
@@ -159,7 +206,7 @@ class ExprSubstr(Expr):
             BaseType.VARCHAR
         )
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         # For simplicity, don't consider substring ever as an aggregate
         return AggregationStatus.NOT_AGGREGATED
 
@@ -172,7 +219,7 @@ class BinaryOp(Enum):
     LESS_THAN = "lessthan"
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprBinaryOp(Expr):
     left: Expr
     op: BinaryOp
@@ -211,14 +258,14 @@ class ExprBinaryOp(Expr):
     def get_name(self) -> str:
         return f"{self.left.get_name()}_{self.op.value}_{self.right.get_name()}"
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         return AggregationStatus.combine(
             self.left.aggregation_status(group_by_exprs),
             self.right.aggregation_status(group_by_exprs)
         )
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprNot(Expr):
     node: Expr
 
@@ -231,7 +278,7 @@ class ExprNot(Expr):
     def get_name(self) -> str:
         return f"not_{self.node.get_name()}"
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         return self.node.aggregation_status(group_by_exprs)
 
 
@@ -242,7 +289,7 @@ class AggOp(Enum):
     COUNT = "count"
 
 
-@dataclass
+@dataclass(eq=False, frozen=True)
 class ExprAgg(Expr):
     op: AggOp
     node: Expr
@@ -265,94 +312,121 @@ class ExprAgg(Expr):
         else:
             raise TypeCheckingError(f"Unknown aggregation operation {self.op}")
 
-    def aggregation_status_internal(self, group_by_exprs: List[Expr]) -> AggregationStatus:
+    def aggregation_status_internal(self, group_by_exprs: Collection[Expr]) -> AggregationStatus:
         if self.node.aggregation_status(group_by_exprs) != AggregationStatus.NOT_AGGREGATED:
             raise AggregationMismatchError(
                 f'Cannot aggregate an already aggregated expression {self.node}')
         return AggregationStatus.AGGREGATED
 
 
-@generate
-def expr():
-    node = yield expr_negation
-
-    while True:
-        res = yield (whitespace >> string_ignore_case("AND") << whitespace).optional()
-        if res == None:
-            break
-        right = yield expr_negation
-
-        node = ExprBinaryOp(node, BinaryOp.AND, right)
-
-    return node
-
-
-@generate
-def expr_negation():
-    negate = yield (string_ignore_case("NOT") << whitespace).optional()
-    node = yield expr_equality
-    if negate != None:
-        node = ExprNot(node)
-    return node
-
-
-@generate
-def expr_equality():
-    left = yield expr_add
-    op_str = yield (padding >> (string("=") | string("<")) << padding).optional()
-    if op_str == None:
-        return left
-    op = BinaryOp.EQUALS
-    if op_str == "=":
-        op = BinaryOp.EQUALS
-    elif op_str == "<":
-        op = BinaryOp.LESS_THAN
-    right = yield expr_add
-
-    return ExprBinaryOp(left, op, right)
-
-
-@generate
-def expr_add():
-    node = yield expr_mult
+# Binding power of each binary operator, higher binds tighter. NOT binds
+# looser than the comparisons but tighter than AND, so `NOT a = b AND c`
+# parses as `(NOT (a = b)) AND c`. Comparisons do not chain.
+binding_powers = {
+    BinaryOp.AND: 1,
+    BinaryOp.EQUALS: 3,
+    BinaryOp.LESS_THAN: 3,
+    BinaryOp.ADDITION: 4,
+    BinaryOp.MULTIPLICATION: 5,
+}
+not_binding_power = 2
+comparison_binding_power = 3
+
+
+def reduce_operators(operands: List[Expr], operators: List[Tuple[int, Optional[BinaryOp]]], min_binding_power: int):
+    """Pops every operator binding at least as tightly as min_binding_power,
+    replacing its operands with the node it builds. A None operator is NOT."""
+    while operators and operators[-1][0] >= min_binding_power:
+        _, op = operators.pop()
+        if op is None:
+            operands.append(ExprNot(operands.pop()))
+        else:
+            right = operands.pop()
+            operands.append(ExprBinaryOp(operands.pop(), op, right))
 
-    while True:
-        res = yield (padding >> string("+") << padding).optional()
-        if res == None:
-            break
-        right = yield expr_mult
 
-        node = ExprBinaryOp(node, BinaryOp.ADDITION, right)
+operator_symbols = {
+    "and": BinaryOp.AND,
+    "=": BinaryOp.EQUALS,
+    "<": BinaryOp.LESS_THAN,
+    "+": BinaryOp.ADDITION,
+    "*": BinaryOp.MULTIPLICATION,
+}
 
-    return node
+# Each operator probe is a single regex, so the whitespace around it is only
+# scanned once. AND needs whitespace on both sides, the symbols only padding.
+not_op = string_ignore_case("NOT") << whitespace
+binary_op = regex(r"\s*([=<+*])\s*|\s+(and)\s+", flags=re.IGNORECASE).map(
+    lambda op: operator_symbols[op.strip().lower()])
+binary_op_no_comparison = regex(r"\s*([+*])\s*|\s+(and)\s+", flags=re.IGNORECASE).map(
+    lambda op: operator_symbols[op.strip().lower()])
 
 
 @generate
-def expr_mult():
-    node = yield expr_paren_terminal
+def expr():
+    operands: List[Expr] = []
+    operators: List[Tuple[int, Optional[BinaryOp]]] = []
+    compared = False
 
     while True:
-        res = yield (padding >> string("*") << padding).optional()
-        if res == None:
+        # NOT may only start an operand of AND
+        if not operators or operators[-1][1] == BinaryOp.AND:
+            negate = yield not_op.optional()
+            if negate != None:
+                operators.append((not_binding_power, None))
+        operand = yield expr_paren_terminal
+        operands.append(operand)
+
+        op = yield (binary_op_no_comparison if compared else binary_op).optional()
+        if op == None:
             break
-        right = yield expr_paren_terminal
-
-        node = ExprBinaryOp(node, BinaryOp.MULTIPLICATION, right)
-
-    return node
-
-
-@generate
-def expr_paren_terminal():
-    node = yield expr_column\
-        | expr_int_literal \
-        | expr_bool_literal \
-        | expr_varchar_literal \
-        | expr_concat \
-        | expr_substr \
-        | expr_agg \
-        | lparen >> expr << rparen
-    return node
+        binding_power = binding_powers[op]
+        reduce_operators(operands, operators, binding_power)
+        if op == BinaryOp.AND:
+            compared = False
+        elif binding_power == comparison_binding_power:
+            compared = True
+        operators.append((binding_power, op))
+
+    reduce_operators(operands, operators, 0)
+    return operands[0]
+
+
+def expr_terminal_kind(stream: str, index: int) -> Optional[str]:
+    """Predicts the only terminal that can parse at index from its first
+    character, or for words from the whole word"""
+    if index >= len(stream):
+        return None
+    char = stream[index]
+    if char == "(":
+        return "paren"
+    if char == '"':
+        return "varchar"
+    if char in "-0123456789":
+        return "int"
+    match = word_pattern.match(stream, index)
+    if match is None:
+        return None
+    word = match.group()
+    if word.find('.') != -1 and word not in keywords:
+        return "column"
+    lowered = word.lower()
+    # bool_literal only needs a prefix to match
+    if lowered.startswith("true") or lowered.startswith("false"):
+        return "bool"
+    if lowered == "concat" or lowered == "substr":
+        return lowered
+    if lowered in agg_op_names:
+        return "agg"
+    return None
+
+
+@Parser
+def expr_paren_terminal(stream, index):
+    kind = expr_terminal_kind(stream, index)
+    if kind is None:
+        return Result.failure(index, "expression")
+    return expr_terminals[kind](stream, index)
 
 
 @generate
@@ -416,3 +490,17 @@ expr_agg_op = (string_ignore_case("MIN")
                | string_ignore_case("MAX")
                | string_ignore_case("AVG")
                | string_ignore_case("COUNT")).map(lambda x: AggOp(x))
+
+
+agg_op_names = {op.value for op in AggOp}
+
+expr_terminals = {
+    "column": expr_column,
+    "int": expr_int_literal,
+    "bool": expr_bool_literal,
+    "varchar": expr_varchar_literal,
+    "concat": expr_concat,
+    "substr": expr_substr,
+    "agg": expr_agg,
+    "paren": lparen >> expr << rparen,
+}
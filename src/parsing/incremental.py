@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.parsing.cache import ParseCache
+from src.parsing.statements import Stmt, StmtSequence
+from src.types.symbol_table import SymbolTable
+from src.types.types import Schema
+
+
+class RecordingSymbolTable(SymbolTable):
+    """View of another symbol table's data that records which names are
+    looked up (with the value they had at the time) and which are written"""
+
+    def __init__(self, data: Dict[str, Schema]):
+        super().__init__()
+        self.data = data
+        self.reads: Dict[str, Optional[Schema]] = {}
+        self.writes: Dict[str, Optional[Schema]] = {}
+        self.read_all = False
+
+    def _record_read(self, key: str):
+        if key not in self.reads and key not in self.writes:
+            self.reads[key] = self.data.get(key)
+
+    def __getitem__(self, key: str) -> Schema:
+        self._record_read(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, str):
+            self._record_read(key)
+        return super().__contains__(key)
+
+    def __setitem__(self, key: str, value: Schema):
+        self._record_read(key)
+        self.writes[key] = value
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str):
+        self._record_read(key)
+        self.writes[key] = None
+        super().__delitem__(key)
+
+    def __iter__(self):
+        self.read_all = True
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self.read_all = True
+        return super().__len__()
+
+
+def same_schema(left: Optional[Schema], right: Optional[Schema]) -> bool:
+    """Whether left and right have the same columns in the same order.
+    Schema equality ignores the order, but set operations depend on it."""
+    if left is right:
+        return True
+    if left is None or right is None:
+        return False
+    return left.names == right.names and left.types == right.types
+
+
+@dataclass
+class StmtRecord():
+    stmt: Stmt
+    reads: Dict[str, Optional[Schema]]
+    writes: Dict[str, Optional[Schema]]
+    read_all: bool = False
+    result: Optional[Tuple[str, Schema]] = None
+    error: Optional[Exception] = None
+
+    def is_valid(self, data: Dict[str, Schema]) -> bool:
+        """Whether every name the statement read still has the same value"""
+        if self.read_all:
+            return False
+        for name, value in self.reads.items():
+            if not same_schema(data.get(name), value):
+                return False
+        return True
+
+
+@dataclass
+class IncrementalChecker():
+    """Re-typechecks a statement sequence after edits.
+
+    Each statement's result is recorded together with the symbol table names
+    it read and wrote. On the next check a statement is only re-run if it
+    changed or if a name it read now has a different schema, so an edit only
+    re-checks the edited statement and the statements that depend on it.
+    Unchanged statements are recognised by identity (as returned by a
+    ParseCache), or by equality with the statement at the same position.
+    """
+    base: Dict[str, Schema] = field(default_factory=dict)
+    cache: ParseCache = field(default_factory=ParseCache)
+    records: List[StmtRecord] = field(default_factory=list)
+    checked: int = 0
+    reused: int = 0
+
+    def find_record(self, stmt: Stmt, position: int, records_by_id: Dict[int, StmtRecord]) -> Optional[StmtRecord]:
+        record = records_by_id.get(id(stmt))
+        if record is not None:
+            return record
+        if position < len(self.records) and self.records[position].stmt == stmt:
+            return self.records[position]
+        return None
+
+    def type_check(self, sequence: StmtSequence) -> Tuple[str, Schema]:
+        """Same result as sequence.type_check(SymbolTable(base))"""
+        self.checked = 0
+        self.reused = 0
+        records_by_id = {id(record.stmt): record for record in self.records}
+        data = dict(self.base)
+        new_records = []
+        result: Tuple[str, Schema] = ("", Schema({}))
+        error = None
+
+        for position, stmt in enumerate(sequence.stmts):
+            record = self.find_record(stmt, position, records_by_id)
+            if record is not None and record.is_valid(data):
+                self.reused += 1
+            else:
+                self.checked += 1
+                st = RecordingSymbolTable(data)
+                record = StmtRecord(stmt, st.reads, st.writes)
+                try:
+                    record.result = stmt.type_check(st)
+                except Exception as e:
+                    record.error = e
+                record.read_all = st.read_all
+
+            new_records.append(record)
+            for name, value in record.writes.items():
+                if value is None:
+                    data.pop(name, None)
+                else:
+                    data[name] = value
+            if record.error is not None:
+                error = record.error
+                break
+            # A record without an error always has a result
+            assert record.result is not None
+            result = record.result
+
+        self.records = new_records
+        if error is not None:
+            raise error
+        return result
+
+    def check_text(self, sql: str) -> Tuple[str, Schema]:
+        """Parses sql through the cache and type checks it incrementally"""
+        return self.type_check(self.cache.parse(sql))
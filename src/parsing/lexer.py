@@ -0,0 +1,54 @@
+from enum import Enum
+import re
+from typing import List, NamedTuple
+
+from parsy import ParseError
+
+
+class TokenKind(Enum):
+    WORD = "word"
+    INT = "int"
+    VARCHAR = "varchar"
+    PUNCT = "punct"
+
+
+class Token(NamedTuple):
+    kind: TokenKind
+    value: str
+    start: int
+    end: int
+
+
+# One alternative per token kind, mirroring the regexes in terminals.py.
+# Whitespace is matched so it can be skipped, but never becomes a token.
+_master_regex = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<word>[a-zA-Z][a-zA-Z0-9_.]*)
+  | (?P<int>-?[0-9]+)
+  | (?P<varchar>"[^"]*")
+  | (?P<punct>[(),;=<+*])
+""", re.VERBOSE)
+
+_token_kinds = {
+    "word": TokenKind.WORD,
+    "int": TokenKind.INT,
+    "varchar": TokenKind.VARCHAR,
+    "punct": TokenKind.PUNCT,
+}
+
+
+def tokenize(sql: str) -> List[Token]:
+    """Scans sql once, returning every non-whitespace token with its position"""
+    tokens = []
+    match = _master_regex.match
+    index = 0
+    while index < len(sql):
+        m = match(sql, index)
+        if m is None:
+            raise ParseError(frozenset(["token"]), sql, index)
+        kind = m.lastgroup
+        end = m.end()
+        if kind is not None and kind != "space":
+            tokens.append(Token(_token_kinds[kind], m.group(), index, end))
+        index = end
+    return tokens
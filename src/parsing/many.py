@@ -0,0 +1,62 @@
+"""Type checks one query against a batch of catalogs.
+
+The query is compiled once. Each catalog is then reduced to the array of
+field names and column types of the tables the query reads (plus the set of
+names in it, if the query's result depends on them), and catalogs with the
+same array share a single run of the program, so a view checked against
+thousands of tenant variants of a schema is only checked once per distinct
+variant.
+"""
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from src.parsing.compiled import QueryProgram, compile_query
+from src.parsing.query import Query
+from src.types.symbol_table import SymbolTable
+from src.types.types import Schema
+
+
+@dataclass
+class CatalogResult():
+    result: Optional[Tuple[str, Schema]] = None
+    error: Optional[Exception] = None
+
+
+def catalog_signature(program: QueryProgram, st: SymbolTable) -> Optional[Hashable]:
+    """Everything about st the result of program depends on, or None if that
+    is not known"""
+    if program.opaque:
+        return None
+    signature: List[Hashable] = []
+    for table in program.tables:
+        schema = st.get(table)
+        if schema is None:
+            signature.append(None)
+        elif isinstance(schema, Schema):
+            signature.append((schema.names, schema.types))
+        else:
+            return None
+    if program.uses_names:
+        signature.append(frozenset(st))
+    return tuple(signature)
+
+
+def type_check_many(query: Query, catalogs: Sequence[SymbolTable]) -> List[CatalogResult]:
+    """Same as [query.type_check(st) for st in catalogs], with each error
+    returned in place of its catalog's result. Catalogs that look the same
+    to the query get the same CatalogResult."""
+    program = compile_query(query)
+    by_signature: Dict[Hashable, CatalogResult] = {}
+    results = []
+    for st in catalogs:
+        signature = catalog_signature(program, st)
+        catalog_result = by_signature.get(signature) if signature is not None else None
+        if catalog_result is None:
+            try:
+                catalog_result = CatalogResult(program.type_check(st))
+            except Exception as e:
+                catalog_result = CatalogResult(error=e)
+            if signature is not None:
+                by_signature[signature] = catalog_result
+        results.append(catalog_result)
+    return results
@@ -0,0 +1,74 @@
+"""Parses the statements of a large input in a process pool.
+
+The input is split at top-level ';' and the statements are sent to the
+workers in chunks of roughly chunk_size characters, so each task is big
+enough to be worth the round trip. The parsed statements come back in
+input order and are reassembled into one StmtSequence, which is then type
+checked serially as usual.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+
+from parsy import ParseError
+from src.parsing.split import stripped_statements
+from src.parsing.statements import Stmt, StmtSequence, stmt
+
+# A parsed statement, or the offset and expected set of its parse error
+ChunkResult = List[Union[Stmt, Tuple[int, frozenset]]]
+
+
+def statement_chunks(sql: str, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Yields the stripped statements of sql with their offsets, grouped into
+    chunks of at least chunk_size characters. Skips the text after a final
+    ';' if it is blank, like ParseCache.parse."""
+    chunk: List[Tuple[int, str]] = []
+    size = 0
+    for offset, stripped in stripped_statements(sql):
+        chunk.append((offset, stripped))
+        size += len(stripped)
+        if size >= chunk_size:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+def parse_chunk(chunk: List[Tuple[int, str]]) -> ChunkResult:
+    results: ChunkResult = []
+    for offset, text in chunk:
+        try:
+            results.append(stmt.parse(text))
+        except ParseError as e:
+            # The error is raised by the parent, with the whole input as its
+            # stream, so only its position is sent back
+            results.append((offset + e.index, e.expected))
+            break
+    return results
+
+
+def parse_parallel(sql: str, jobs: Optional[int] = None, chunk_size: int = 1 << 16) -> StmtSequence:
+    """Parses sql like ParseCache.parse with jobs worker processes (one per
+    core if None). Raises the ParseError of the first statement that fails."""
+    chunks = statement_chunks(sql, chunk_size)
+    if jobs is not None and jobs <= 1:
+        chunk_results: Iterator[ChunkResult] = map(parse_chunk, chunks)
+        return _reassemble(sql, chunk_results)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        try:
+            return _reassemble(sql, executor.map(parse_chunk, chunks))
+        except ParseError:
+            # Later chunks are not needed any more
+            executor.shutdown(cancel_futures=True)
+            raise
+
+
+def _reassemble(sql: str, chunk_results: Iterator[ChunkResult]) -> StmtSequence:
+    stmts = []
+    for results in chunk_results:
+        for result in results:
+            if isinstance(result, tuple):
+                index, expected = result
+                raise ParseError(expected, sql, index)
+            stmts.append(result)
+    return StmtSequence(stmts)
@@ -1,11 +1,11 @@
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
-from parsy import generate, whitespace
+from parsy import Parser, Result, generate, whitespace
 from src.parsing.expr import Expr, expr
 from src.parsing.s_expr import SExpr, s_expr
-from src.parsing.terminals import (lparen, padding, rparen, sep,
-                                   string_ignore_case, t_name)
+from src.parsing.terminals import (keywords, lparen, padding, rparen, sep,
+                                   string_ignore_case, t_name, word_pattern)
 from src.types.symbol_table import SymbolTable
 from src.types.types import (AggregationMismatchError, AggregationStatus,
                              BaseType, RedefinedNameError, Schema, Type,
@@ -82,10 +82,10 @@ class QuerySelect(Query):
         output_schema_fields: Dict[str, BaseType] = {}
         from_name, from_schema = self.from_query.type_check(st)
         from_schema_expanded = from_schema.expand(from_name)
+        # Select expression must only reference from query schema
+        select_st = SymbolTable({from_name: from_schema})
         for select_expr in self.select_list:
-            # Select expression must only reference from query schema
-            select_expr_type = select_expr.type_check(
-                SymbolTable({from_name: from_schema}))
+            select_expr_type = select_expr.type_check(select_st)
             if not from_schema_expanded.is_subtype(select_expr_type.inputs):
                 raise TypeMismatchError(
                     from_schema_expanded, select_expr_type.inputs)
@@ -96,9 +96,10 @@ class QuerySelect(Query):
             from_schema,
             Schema(output_schema_fields)
         )
+        # WHERE, GROUP BY and HAVING can also reference the select list
+        internal_st = SymbolTable({from_name: internal_schema})
         if self.condition is not None:
-            condition_type = self.condition.type_check(
-                SymbolTable({from_name: internal_schema}))
+            condition_type = self.condition.type_check(internal_st)
             if not internal_schema.is_subtype(condition_type.inputs.simplify()):
                 raise TypeMismatchError(
                     internal_schema, condition_type.inputs.simplify())
@@ -106,31 +107,30 @@ class QuerySelect(Query):
                 raise TypeMismatchError(BaseType.BOOL, condition_type.output)
 
         if self.groupby_exprs is not None:
+            groupby_exprs = set(self.groupby_exprs)
             for group_expr in self.groupby_exprs:
-                expr_type = group_expr.type_check(
-                    SymbolTable({from_name: internal_schema}))
+                expr_type = group_expr.type_check(internal_st)
                 if not internal_schema.is_subtype(expr_type.inputs.simplify()):
                     raise TypeMismatchError(
                         internal_schema, expr_type.inputs.simplify())
 
             for select_expr in self.select_list:
-                if select_expr.expr.aggregation_status(self.groupby_exprs) == AggregationStatus.NOT_AGGREGATED:
+                if select_expr.expr.aggregation_status(groupby_exprs) == AggregationStatus.NOT_AGGREGATED:
                     raise AggregationMismatchError(
                         f'Select expression {select_expr.expr} is not aggregated')
 
             if self.having_condition is not None:
-                expr_type = self.having_condition.type_check(
-                    SymbolTable({from_name: internal_schema}))
+                expr_type = self.having_condition.type_check(internal_st)
                 if not internal_schema.is_subtype(expr_type.inputs.simplify()):
                     raise TypeMismatchError(
                         internal_schema, expr_type.inputs.simplify())
 
-                if self.having_condition.aggregation_status(self.groupby_exprs) == AggregationStatus.NOT_AGGREGATED:
+                if self.having_condition.aggregation_status(groupby_exprs) == AggregationStatus.NOT_AGGREGATED:
                     raise AggregationMismatchError(
                         f'Having condition {self.having_condition} is not aggregated')
 
             if self.condition is not None:
-                if self.condition.aggregation_status(self.groupby_exprs) == AggregationStatus.AGGREGATED:
+                if self.condition.aggregation_status(groupby_exprs) == AggregationStatus.AGGREGATED:
                     raise AggregationMismatchError(
                         f'Where condition {self.condition} is aggregated')
 
@@ -138,59 +138,33 @@ class QuerySelect(Query):
 
 
 @dataclass
-class QueryIntersect(Query):
+class QuerySetOperation(Query):
     queries: List[Query]
 
     def type_check(self, st: SymbolTable) -> Tuple[str, Schema]:
+        # Each branch is checked exactly once, and must have the same field
+        # types as the first one
         full_name = ""
-        prev_name, first_schema = self.queries[0].type_check(st)
-        final_schema = first_schema
-
-        i = 0
+        schemas: List[Schema] = []
         for query in self.queries:
             from_name, from_schema = query.type_check(st)
             full_name += from_name[0] + from_name[-1] + "_"
-            if not Schema.equals(first_schema, from_schema):
-                raise TypeMismatchError(first_schema, from_schema)
-            elif i != 0:  # not first iteration
-                final_schema = Schema.merge_fields(final_schema, from_schema)
-            i += 1
-
-        full_name = full_name.strip("_")
-        temp = full_name
-        i = 0
-        while temp in st:
-            temp = full_name + "_" + str(i)
+            if schemas and not Schema.equals(schemas[0], from_schema):
+                raise TypeMismatchError(schemas[0], from_schema)
+            schemas.append(from_schema)
+        final_schema = Schema.merge_all(schemas)
 
-        return temp, final_schema
+        return st.fresh_name(full_name.strip("_")), final_schema
 
 
 @dataclass
-class QueryUnion(Query):
-    queries: List[Query]
+class QueryIntersect(QuerySetOperation):
+    pass
 
-    def type_check(self, st: SymbolTable) -> Tuple[str, Schema]:
-        full_name = ""
-        prev_name, first_schema = self.queries[0].type_check(st)
-        final_schema = first_schema
 
-        i = 0
-        for query in self.queries:
-            from_name, from_schema = query.type_check(st)
-            full_name += from_name[0] + from_name[-1] + "_"
-            if not Schema.equals(first_schema, from_schema):
-                raise TypeMismatchError(first_schema, from_schema)
-            elif i != 0:  # not first iteration
-                final_schema = Schema.merge_fields(final_schema, from_schema)
-            i += 1
-
-        full_name = full_name.strip("_")
-        temp = full_name
-        i = 0
-        while temp in st:
-            temp = full_name + "_" + str(i)
-
-        return temp, final_schema
+@dataclass
+class QueryUnion(QuerySetOperation):
+    pass
 
 
 @generate
@@ -250,12 +224,31 @@ def query_join():
     return node
 
 
-@generate
-def query_terminal():
-    node = yield query_table \
-        | query_select \
-        | lparen >> query << rparen
-    return node
+def query_terminal_kind(stream: str, index: int) -> Optional[str]:
+    """Predicts the only query terminal that can parse at index"""
+    if index >= len(stream):
+        return None
+    char = stream[index]
+    if char == "(":
+        return "paren"
+    if char.isspace():
+        # Only query_select skips leading whitespace
+        return "select"
+    match = word_pattern.match(stream, index)
+    if match is None:
+        return None
+    word = match.group()
+    if word.find('.') == -1 and word not in keywords:
+        return "table"
+    return "select"
+
+
+@Parser
+def query_terminal(stream, index):
+    kind = query_terminal_kind(stream, index)
+    if kind is None:
+        return Result.failure(index, "query")
+    return query_terminals[kind](stream, index)
 
 
 @generate
@@ -291,3 +284,10 @@ def query_select():
             having_condition = yield expr
 
     return QuerySelect(expressions, from_query, condition, groupby_exprs, having_condition)
+
+
+query_terminals = {
+    "table": query_table,
+    "select": query_select,
+    "paren": lparen >> query << rparen,
+}
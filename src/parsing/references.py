@@ -0,0 +1,270 @@
+"""Inverted index from tables and columns to the statements using them.
+
+Column references are resolved through aliases, joins and nested selects
+to the catalog tables they can come from. A reference through a join is
+recorded for every table of the join, and only narrowed down when the
+index is queried, using the columns of the tables' CREATE TABLE
+statements, so the index does not depend on the order files are added in.
+"""
+from collections import defaultdict
+from dataclasses import fields
+import hashlib
+import os
+import pickle
+from typing import Any, DefaultDict, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from parsy import ParseError
+from src.parsing.cache import ParseCache
+from src.parsing.expr import Expr, ExprColumn
+from src.parsing.query import (Query, QueryJoin, QuerySelect,
+                               QuerySetOperation, QueryTable)
+from src.parsing.split import stripped_statements
+from src.parsing.statements import Stmt, StmtCreateTable, StmtQuery
+from src.types.types import BaseType
+
+# Bumped whenever the index layout changes, so stale index files are ignored
+INDEX_FORMAT_VERSION = 2
+
+
+class Location(NamedTuple):
+    filename: str
+    # Position of the statement in the file, and its offset and line
+    statement: int
+    offset: int
+    line: int
+
+    def __str__(self) -> str:
+        return f"{self.filename}:{self.line}"
+
+
+def iter_columns(node: Expr) -> Iterator[ExprColumn]:
+    if isinstance(node, ExprColumn):
+        yield node
+        return
+    for field in fields(node):
+        value = getattr(node, field.name)
+        if isinstance(value, Expr):
+            yield from iter_columns(value)
+
+
+class StatementReferences():
+    """Tables and columns one statement references"""
+
+    def __init__(self):
+        self.tables: Set[str] = set()
+        self.columns: Set[Tuple[str, str]] = set()
+        # Tables whose whole schema reaches the result, through a join, a
+        # set operation or as the query itself, so any change to them
+        # changes the statement's result
+        self.schema_uses: Set[str] = set()
+        # Tables each query name may refer to
+        self.aliases: Dict[str, Set[str]] = {}
+
+    def add_query(self, node: Query, whole_schema: bool = True) -> Tuple[str, Set[str]]:
+        """Returns the name the query's result is referenced by and the
+        tables it is made from"""
+        if isinstance(node, QueryTable):
+            self.tables.add(node.table_name)
+            if whole_schema:
+                self.schema_uses.add(node.table_name)
+            sources = {node.table_name}
+            name = node.get_output_table_name()
+        elif isinstance(node, QueryJoin):
+            left_name, left_sources = self.add_query(node.left)
+            right_name, right_sources = self.add_query(node.right)
+            self.add_expr(node.condition, {left_name: left_sources,
+                                           right_name: right_sources})
+            sources = left_sources | right_sources
+            name = node.output_name
+        elif isinstance(node, QuerySelect):
+            name, sources = self.add_query(node.from_query, whole_schema=False)
+            scope = {name: sources}
+            exprs: List[Optional[Expr]] = [s_expr.expr for s_expr in node.select_list]
+            exprs += [node.condition, node.having_condition]
+            exprs += node.groupby_exprs or []
+            for expr in exprs:
+                if expr is not None:
+                    self.add_expr(expr, scope)
+        elif isinstance(node, QuerySetOperation):
+            sources = set()
+            for query in node.queries:
+                sources |= self.add_query(query)[1]
+            # The name is only chosen when type checking
+            name = ""
+        else:
+            return "", set()
+        self.aliases[name] = sources
+        return name, sources
+
+    def add_expr(self, node: Expr, scope: Dict[str, Set[str]]):
+        for column in iter_columns(node):
+            name, column_name = column.table_column_name
+            sources = scope.get(name) or self.aliases.get(name) or {name}
+            if "." in column_name:
+                # A column of one side of a join, qualified by its table
+                prefix, column_name = column_name.rsplit(".", 1)
+                sources = self.aliases.get(prefix) or {prefix}
+            for table in sources:
+                self.columns.add((table, column_name))
+
+
+class FileEntries():
+    """What one file added to the index, so that removing the file only
+    visits its own entries"""
+
+    def __init__(self):
+        self.tables: List[Tuple[str, Location]] = []
+        self.columns: List[Tuple[Tuple[str, str], Location]] = []
+        self.schema_uses: List[Tuple[str, Location]] = []
+        self.definitions: List[str] = []
+
+
+def file_key(sql: str) -> bytes:
+    return hashlib.blake2b(sql.encode(), digest_size=16).digest()
+
+
+class ReferenceIndex():
+    """Which statements of a set of files reference each table and column.
+
+    Files are re-indexed only when their contents change, and the index is
+    loaded from and saved to path if one is given.
+    """
+
+    def __init__(self, path: Optional[str] = None, cache: Optional[ParseCache] = None):
+        self.path = path
+        self.cache = cache if cache is not None else ParseCache()
+        self.files: Dict[str, bytes] = {}
+        self.tables: DefaultDict[str, Set[Location]] = defaultdict(set)
+        self.columns: DefaultDict[Tuple[str, str], Set[Location]] = defaultdict(set)
+        self.schema_uses: DefaultDict[str, Set[Location]] = defaultdict(set)
+        self.definitions: Dict[str, Tuple[Location, Dict[str, BaseType]]] = {}
+        self.parse_errors: Dict[str, str] = {}
+        self.file_entries: Dict[str, FileEntries] = {}
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def remove_file(self, filename: str):
+        self.files.pop(filename, None)
+        self.parse_errors.pop(filename, None)
+        entries = self.file_entries.pop(filename, None)
+        if entries is None:
+            return
+        indexed: List[Tuple[DefaultDict[Any, Set[Location]], List[Tuple[Any, Location]]]] = [
+            (self.tables, entries.tables), (self.columns, entries.columns),
+            (self.schema_uses, entries.schema_uses)]
+        for index, added in indexed:
+            for key, location in added:
+                locations = index[key]
+                locations.discard(location)
+                if not locations:
+                    del index[key]
+        for table in entries.definitions:
+            definition = self.definitions.get(table)
+            # Another file may have defined the table since
+            if definition is not None and definition[0].filename == filename:
+                del self.definitions[table]
+
+    def add_statement(self, location: Location, statement: Stmt):
+        entries = self.file_entries.setdefault(location.filename, FileEntries())
+        if isinstance(statement, StmtCreateTable):
+            self.definitions[statement.table_name] = (location, {
+                element.column_name: element.base_type
+                for element in statement.table_elements})
+            entries.definitions.append(statement.table_name)
+            return
+        if not isinstance(statement, StmtQuery):
+            return
+        references = StatementReferences()
+        references.add_query(statement.query)
+        for table in references.tables:
+            self.tables[table].add(location)
+            entries.tables.append((table, location))
+        for column in references.columns:
+            self.columns[column].add(location)
+            entries.columns.append((column, location))
+        for table in references.schema_uses:
+            self.schema_uses[table].add(location)
+            entries.schema_uses.append((table, location))
+
+    def add_file(self, filename: str, sql: Optional[str] = None) -> bool:
+        """Indexes filename, returning False if it was already indexed with
+        the same contents. Statements that do not parse are skipped, and the
+        first error is kept in parse_errors."""
+        if sql is None:
+            with open(filename) as f:
+                sql = f.read()
+        key = file_key(sql)
+        if self.files.get(filename) == key:
+            return False
+        self.remove_file(filename)
+        self.files[filename] = key
+        line = 1
+        line_offset = 0
+        for i, (offset, stripped) in enumerate(stripped_statements(sql)):
+            line += sql.count("\n", line_offset, offset)
+            line_offset = offset
+            try:
+                statement = self.cache.parse_statement(stripped)
+            except ParseError as e:
+                self.parse_errors.setdefault(
+                    filename, str(ParseError(e.expected, sql, offset + e.index)))
+                continue
+            self.add_statement(Location(filename, i, offset, line), statement)
+        return True
+
+    def table_references(self, table: str) -> Set[Location]:
+        return set(self.tables.get(table, ()))
+
+    def column_references(self, table: str, column: str) -> Set[Location]:
+        definition = self.definitions.get(table)
+        if definition is not None and column not in definition[1]:
+            # Only recorded because table is part of a join
+            return set()
+        return set(self.columns.get((table, column), ()))
+
+    def impact(self, create_table: StmtCreateTable) -> Set[Location]:
+        """Statements whose result may change if the table were redefined
+        by create_table"""
+        table = create_table.table_name
+        definition = self.definitions.get(table)
+        if definition is None:
+            return self.table_references(table)
+        old_columns = definition[1]
+        new_columns = {element.column_name: element.base_type
+                       for element in create_table.table_elements}
+        affected: Set[Location] = set()
+        for column, base_type in old_columns.items():
+            if new_columns.get(column) != base_type:
+                affected |= self.columns.get((table, column), set())
+        if new_columns != old_columns:
+            affected |= self.schema_uses.get(table, set())
+        return affected
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                version, state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            # A missing or corrupt index file just means re-indexing
+            return
+        if version != INDEX_FORMAT_VERSION:
+            return
+        files, tables, columns, schema_uses, definitions, parse_errors, file_entries = state
+        self.files = files
+        self.tables = defaultdict(set, tables)
+        self.columns = defaultdict(set, columns)
+        self.schema_uses = defaultdict(set, schema_uses)
+        self.definitions = definitions
+        self.parse_errors = parse_errors
+        self.file_entries = file_entries
+
+    def save(self):
+        if self.path is None:
+            return
+        state = (self.files, dict(self.tables), dict(self.columns),
+                 dict(self.schema_uses), self.definitions, self.parse_errors,
+                 self.file_entries)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump((INDEX_FORMAT_VERSION, state), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,35 @@
+import re
+from typing import Iterator, List, Tuple
+
+# A varchar literal has no escapes, so a ';' is a statement boundary unless
+# it is between a pair of double quotes. An unterminated literal runs to the
+# end of the input.
+_boundary_pattern = re.compile(r'"[^"]*"?|;')
+
+
+def split_statements(sql: str) -> List[Tuple[int, str]]:
+    """Splits sql at top-level ';', returning each statement's offset and
+    text. The text after the final ';' is included even if it is blank."""
+    statements = []
+    start = 0
+    for match in _boundary_pattern.finditer(sql):
+        if match.group() == ";":
+            statements.append((start, sql[start:match.start()]))
+            start = match.end()
+    statements.append((start, sql[start:]))
+    return statements
+
+
+def stripped_statements(sql: str) -> Iterator[Tuple[int, str]]:
+    """Yields each statement of sql without its surrounding whitespace, and
+    the offset it starts at. Like stmt_sequence, the first statement keeps
+    its leading whitespace, which only SELECT and CREATE TABLE accept. Blank
+    text after the final ';' is skipped, so that a trailing ';' is
+    accepted."""
+    statements = split_statements(sql)
+    for i, (offset, text) in enumerate(statements):
+        leading = 0 if i == 0 else len(text) - len(text.lstrip())
+        stripped = text[leading:].rstrip()
+        if stripped == "" and i == len(statements) - 1 and i > 0:
+            return
+        yield offset + leading, stripped
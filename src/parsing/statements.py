@@ -1,7 +1,7 @@
 from src.types.types import BaseType, RedefinedNameError, Schema, Type
 from src.types.types import Schema, Type, TypeMismatchError
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 from parsy import generate, whitespace, string
 
 from src.parsing.query import Query, query
@@ -61,11 +61,18 @@ class StmtSequence(Stmt):
     stmts: List[Stmt]
 
     def type_check(self, st: SymbolTable) -> Tuple[str, Schema]:
-        table_name = ""
-        schema = Schema({})
-        for stmt in self.stmts:
-            table_name, schema = stmt.type_check(st)
-        return table_name, schema
+        return type_check_stmts(self.stmts, st)
+
+
+def type_check_stmts(stmts: Iterable[Stmt], st: SymbolTable) -> Tuple[str, Schema]:
+    """StmtSequence.type_check over statements that are produced lazily, e.g.
+    by iter_statements. Each statement is checked as soon as it is produced
+    and then dropped, and the first error stops the iteration."""
+    table_name = ""
+    schema = Schema({})
+    for stmt in stmts:
+        table_name, schema = stmt.type_check(st)
+    return table_name, schema
 
 
 @generate
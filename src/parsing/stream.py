@@ -0,0 +1,171 @@
+"""Parses statements one at a time from a file, in constant memory."""
+from contextlib import contextmanager
+import mmap
+import re
+from typing import Iterator, Optional, TextIO, Tuple, Union
+
+from parsy import ParseError, line_info_at
+from src.parsing.statements import Stmt, stmt
+
+_special_pattern = re.compile(r'[";]')
+# In UTF-8 the bytes of '"' and ';' never occur inside a multi-byte
+# character, so statement boundaries can be found in the raw bytes
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class StatementParseError(ParseError):
+    """ParseError in one statement of a stream. stream and index are the
+    statement text and the position in it, line_info gives the position in
+    the whole input"""
+
+    def __init__(self, error: ParseError, offset: int, line: int, column: int):
+        super().__init__(error.expected, error.stream, error.index)
+        self.offset = offset
+        self.line = line
+        self.column = column
+
+    def line_info(self) -> str:
+        return f"{self.line}:{self.column}"
+
+
+def iter_statement_texts(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Tuple[int, str]]:
+    """Like split_statements, but reads f a chunk at a time and yields each
+    statement's offset and text as soon as its ';' is read"""
+    pieces = []
+    statement_offset = 0
+    chunk_offset = 0
+    in_string = False
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        piece_start = 0
+        search_start = 0
+        while True:
+            if in_string:
+                end = chunk.find('"', search_start)
+                if end == -1:
+                    break
+                in_string = False
+                search_start = end + 1
+                continue
+            match = _special_pattern.search(chunk, search_start)
+            if match is None:
+                break
+            search_start = match.end()
+            if match.group() == '"':
+                in_string = True
+                continue
+            pieces.append(chunk[piece_start:match.start()])
+            yield statement_offset, "".join(pieces)
+            pieces = []
+            piece_start = match.end()
+            statement_offset = chunk_offset + match.end()
+        pieces.append(chunk[piece_start:])
+        chunk_offset += len(chunk)
+    yield statement_offset, "".join(pieces)
+
+
+def iter_buffer_statement_texts(buffer: Buffer, encoding: str = "utf-8") -> Iterator[Tuple[int, str]]:
+    """Like iter_statement_texts over a bytes buffer such as an mmap of the
+    input. Boundaries are found on the raw bytes and only one statement at a
+    time is decoded. Offsets are in bytes."""
+    # Only find is used on the buffer: a regex scanner or match object kept
+    # alive by a suspended generator would stop the mmap from being closed
+    start = 0
+    next_quote = buffer.find(b'"')
+    while True:
+        semicolon = buffer.find(b";", start)
+        while next_quote != -1 and (semicolon == -1 or next_quote < semicolon):
+            # An unterminated literal runs to the end of the input
+            close = buffer.find(b'"', next_quote + 1)
+            if close == -1:
+                semicolon = -1
+                break
+            if semicolon != -1 and semicolon < close:
+                semicolon = buffer.find(b";", close + 1)
+            next_quote = buffer.find(b'"', close + 1)
+        if semicolon == -1:
+            break
+        yield start, buffer[start:semicolon].decode(encoding)
+        start = semicolon + 1
+    yield start, buffer[start:].decode(encoding)
+
+
+@contextmanager
+def map_file(filename: str) -> Iterator[Buffer]:
+    """Maps filename read-only. An empty file cannot be mapped, so it is
+    returned as empty bytes."""
+    with open(filename, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+        with buffer:
+            yield buffer
+
+
+def _advance(line: int, column: int, text: str) -> Tuple[int, int]:
+    """Position after text, starting at (line, column)"""
+    newlines = text.count("\n")
+    if newlines == 0:
+        return line, column + len(text)
+    return line + newlines, len(text) - text.rfind("\n") - 1
+
+
+def iter_statements(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Stmt]:
+    """Yields the statements of f one at a time, accepting the same input as
+    ParseCache.parse. Each statement is parsed as soon as its ';' is read, so
+    a syntax error is raised without reading further."""
+    return _parse_statements(iter_statement_texts(f, chunk_size))
+
+
+def iter_buffer_statements(buffer: Buffer, encoding: str = "utf-8") -> Iterator[Stmt]:
+    """iter_statements over a bytes buffer, see iter_buffer_statement_texts.
+    StatementParseError.offset is in bytes."""
+    return _parse_statements(iter_buffer_statement_texts(buffer, encoding), encoding)
+
+
+def _parse_statements(texts: Iterator[Tuple[int, str]], encoding: Optional[str] = None) -> Iterator[Stmt]:
+    line, column = 0, 0
+    stmt_count = 0
+    # A blank statement is only an error if it is not the trailing text after
+    # the final ';', which is not known until the next statement is read
+    blank = None
+    for i, (offset, text) in enumerate(texts):
+        if blank is not None:
+            _parse_statement(*blank)
+        if text.strip() == "":
+            blank = (offset, text, line, column, encoding, i == 0)
+        else:
+            yield _parse_statement(offset, text, line, column, encoding, i == 0)
+            stmt_count += 1
+        # Skip the statement and its ';'
+        line, column = _advance(line, column, text)
+        column += 1
+    if blank is not None and stmt_count == 0:
+        _parse_statement(*blank)
+
+
+def _parse_statement(offset: int, text: str, line: int, column: int, encoding: Optional[str], first: bool) -> Stmt:
+    """offset counts characters, or bytes in encoding if it is given"""
+    # Like stmt_sequence, the whitespace after a ';' is skipped, but the
+    # first statement decides itself whether it may start with whitespace
+    leading = 0 if first else len(text) - len(text.lstrip())
+    line, column = _advance(line, column, text[:leading])
+    # Leading whitespace is ASCII, so it is as many bytes as characters
+    offset += leading
+    stripped = text[leading:].rstrip()
+    try:
+        return stmt.parse(stripped)
+    except ParseError as e:
+        error_line, error_column = line_info_at(stripped, e.index)
+        if error_line == 0:
+            error_column += column
+        error_offset = e.index
+        if encoding is not None:
+            error_offset = len(stripped[:e.index].encode(encoding))
+        raise StatementParseError(
+            e, offset + error_offset, line + error_line, error_column) from None
@@ -1,3 +1,5 @@
+import re
+
 from parsy import regex, string, seq, Parser, fail, generate
 
 
@@ -14,6 +16,8 @@ space = regex(r"\s+")
 padding = regex(r"\s*")
 as_tok = space + string("AS") + space
 
+word_pattern = re.compile(r"[a-zA-Z][a-zA-Z0-9_.]*")
+
 keywords = ["true", "false", "BOOL", "INT", "VARCHAR",
             "AND", "NOT", "AS", "JOIN", "ON", "SELECT", "FROM", "WHERE",
             "CREATE", "TABLE", "UNION", "INTERSECT", "GROUP", "BY",
@@ -22,7 +26,7 @@ keywords = ["true", "false", "BOOL", "INT", "VARCHAR",
 
 @generate
 def identifier():
-    ident = yield regex("[a-zA-Z][a-zA-Z0-9_\.]*")
+    ident = yield regex(word_pattern)
     if ident in keywords:
         return fail("identifier cannot be a keyword")
     return ident
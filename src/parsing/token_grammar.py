@@ -0,0 +1,421 @@
+"""Token-level version of the grammar in expr.py, query.py and statements.py.
+
+Parses the output of lexer.tokenize and builds the same AST nodes as the
+character-level parsers. Whitespace never reaches this grammar, so where
+the character-level grammar requires or forbids it, the gap between two
+tokens' positions is checked instead. The only difference is whitespace
+after the last token, which is accepted.
+"""
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from parsy import ParseError, Parser, Result, fail, generate, test_item
+
+from src.parsing.expr import (AggOp, BinaryOp, Expr, ExprAgg,
+                              ExprBoolLiteral, ExprColumn, ExprConcat,
+                              ExprIntLiteral, ExprSubstr, ExprVarcharLiteral,
+                              agg_op_names, binding_powers,
+                              comparison_binding_power,
+                              not_binding_power, operator_symbols,
+                              reduce_operators)
+from src.parsing.lexer import Token, TokenKind, tokenize
+from src.parsing.query import (QueryIntersect, QueryJoin, QuerySelect,
+                               QueryTable, QueryUnion)
+from src.parsing.s_expr import SExpr
+from src.parsing.statements import (StmtCreateTable, StmtQuery, StmtSequence,
+                                    TableElement)
+from src.parsing.terminals import keywords
+from src.types.types import BaseType
+
+
+@lru_cache(maxsize=None)
+def punct(symbol: str) -> Parser:
+    return test_item(
+        lambda t: t.kind is TokenKind.PUNCT and t.value == symbol, symbol)
+
+
+@lru_cache(maxsize=None)
+def keyword(word: str) -> Parser:
+    """Matches a keyword ignoring case, like string_ignore_case"""
+    lowered = word.lower()
+    return test_item(
+        lambda t: t.kind is TokenKind.WORD and t.value.lower() == lowered, lowered)
+
+
+@lru_cache(maxsize=None)
+def call(name: str) -> Parser:
+    """Matches `NAME(`, which does not allow whitespace before the parenthesis"""
+    @generate
+    def call_parser():
+        name_token = yield keyword(name)
+        paren = yield lparen
+        if paren.start != name_token.end:
+            return fail(f"{name.lower()}(")
+        return name_token
+    return call_parser
+
+
+def space_before(stream, index: int) -> bool:
+    """Whether there is whitespace before the token at index"""
+    previous_end = stream[index - 1].end if index > 0 else 0
+    return stream[index].start > previous_end
+
+
+@Parser
+def gap(stream, index):
+    """Requires whitespace before the next token, like `whitespace`"""
+    if index < len(stream) and space_before(stream, index):
+        return Result.success(index, None)
+    return Result.failure(index, "whitespace")
+
+
+@Parser
+def no_gap(stream, index):
+    """Requires the next token to follow the previous one directly"""
+    if index < len(stream) and space_before(stream, index):
+        return Result.failure(index, "no whitespace")
+    return Result.success(index, None)
+
+
+@lru_cache(maxsize=None)
+def spaced(word: str) -> Parser:
+    """Matches a keyword with whitespace on both sides"""
+    return gap >> keyword(word) << gap
+
+
+lparen = punct("(")
+rparen = punct(")")
+comma = punct(",")
+semicolon = punct(";")
+
+identifier = test_item(
+    lambda t: t.kind is TokenKind.WORD and t.value not in keywords,
+    "identifier").map(lambda t: t.value)
+t_name = test_item(
+    lambda t: t.kind is TokenKind.WORD and t.value not in keywords
+    and t.value.find('.') == -1,
+    "table name").map(lambda t: t.value)
+type_literal = (keyword("BOOL") | keyword("INT") | keyword("VARCHAR")).map(
+    lambda t: t.value.upper())
+
+
+not_op = keyword("NOT") << gap
+
+
+def optional_operator(comparison: bool) -> Parser:
+    """Matches a binary operator, or nothing, with a single look at the next
+    token, like the single regex probes in expr.py. AND needs whitespace on
+    both sides."""
+    @Parser
+    def operator_parser(stream, index):
+        if index < len(stream):
+            token = stream[index]
+            op = None
+            if token.kind is TokenKind.PUNCT:
+                op = operator_symbols.get(token.value)
+                if op is not None and not comparison \
+                        and binding_powers[op] == comparison_binding_power:
+                    op = None
+            elif token.kind is TokenKind.WORD and token.value.lower() == "and" \
+                    and space_before(stream, index) \
+                    and index + 1 < len(stream) and space_before(stream, index + 1):
+                op = BinaryOp.AND
+            if op is not None:
+                return Result.success(index + 1, op)
+        # Like .optional(), keep what was expected for the error message
+        return Result(True, index, None, index, frozenset(["operator"]))
+    return operator_parser
+
+
+binary_op = optional_operator(comparison=True)
+binary_op_no_comparison = optional_operator(comparison=False)
+
+
+@generate
+def expr():
+    # Same precedence loop as expr.expr, over tokens
+    operands: List[Expr] = []
+    operators: List[Tuple[int, Optional[BinaryOp]]] = []
+    compared = False
+
+    while True:
+        if not operators or operators[-1][1] == BinaryOp.AND:
+            negate = yield not_op.optional()
+            if negate != None:
+                operators.append((not_binding_power, None))
+        operand = yield expr_paren_terminal
+        operands.append(operand)
+
+        op = yield binary_op_no_comparison if compared else binary_op
+        if op == None:
+            break
+        binding_power = binding_powers[op]
+        reduce_operators(operands, operators, binding_power)
+        if op == BinaryOp.AND:
+            compared = False
+        elif binding_power == comparison_binding_power:
+            compared = True
+        operators.append((binding_power, op))
+
+    reduce_operators(operands, operators, 0)
+    return operands[0]
+
+
+def expr_terminal_kind(token: Token) -> Optional[str]:
+    """Like expr.expr_terminal_kind, from the first token"""
+    if token.kind is TokenKind.PUNCT:
+        return "paren" if token.value == "(" else None
+    if token.kind is TokenKind.VARCHAR:
+        return "varchar"
+    if token.kind is TokenKind.INT:
+        return "int"
+    word = token.value
+    if word.find('.') != -1 and word not in keywords:
+        return "column"
+    lowered = word.lower()
+    if lowered == "true" or lowered == "false":
+        return "bool"
+    if lowered == "concat" or lowered == "substr":
+        return lowered
+    if lowered in agg_op_names:
+        return "agg"
+    return None
+
+
+@Parser
+def expr_paren_terminal(stream, index):
+    if index >= len(stream):
+        return Result.failure(index, "expression")
+    token = stream[index]
+    kind = expr_terminal_kind(token)
+    if kind is None:
+        return Result.failure(index, "expression")
+    build = single_token_terminals.get(kind)
+    if build is not None:
+        return Result.success(index + 1, build(token.value))
+    return expr_terminals[kind](stream, index)
+
+
+@generate
+def expr_concat():
+    yield call("CONCAT")
+    left = yield expr
+    yield comma
+    right = yield expr
+    yield rparen
+    return ExprConcat(left, right)
+
+
+@generate
+def expr_substr():
+    yield call("SUBSTR")
+    input = yield expr
+    yield comma
+    start = yield expr
+    yield comma
+    end = yield expr
+    yield rparen
+    return ExprSubstr(input, start, end)
+
+
+@generate
+def expr_agg():
+    op_token = yield call("MIN") | call("MAX") | call("AVG") | call("COUNT")
+    node = yield no_gap >> expr << no_gap << rparen
+
+    return ExprAgg(AggOp(op_token.value.lower()), node)
+
+
+def column_name(value: str) -> Tuple[str, str]:
+    table_name, _, field = value.partition('.')
+    return (table_name, field)
+
+
+# Terminals of one token are built directly from the token's text
+single_token_terminals: Dict[str, Callable[[str], Expr]] = {
+    "column": lambda value: ExprColumn(column_name(value)),
+    "int": lambda value: ExprIntLiteral(int(value)),
+    "bool": lambda value: ExprBoolLiteral(value.lower() == "true"),
+    "varchar": lambda value: ExprVarcharLiteral(value[1:-1]),
+}
+
+expr_terminals = {
+    "concat": expr_concat,
+    "substr": expr_substr,
+    "agg": expr_agg,
+    "paren": lparen >> no_gap >> expr << no_gap << rparen,
+}
+
+
+@generate
+def s_expr():
+    internal_expr = yield expr
+    name = yield (spaced("AS") >> identifier).optional()
+    return SExpr(internal_expr, name)
+
+
+@generate
+def query():
+    nodes = []
+    node = yield query_intersect
+    nodes.append(node)
+
+    while True:
+        res = yield spaced("UNION").optional()
+        if res == None:
+            break
+        next_node = yield query_intersect
+
+        nodes.append(next_node)
+
+    if len(nodes) == 1:
+        return nodes[0]
+    return QueryUnion(nodes)
+
+
+@generate
+def query_intersect():
+    nodes = []
+    node = yield query_join
+    nodes.append(node)
+
+    while True:
+        res = yield spaced("INTERSECT").optional()
+        if res == None:
+            break
+        next_node = yield query_join
+
+        nodes.append(next_node)
+
+    if len(nodes) == 1:
+        return nodes[0]
+    return QueryIntersect(nodes)
+
+
+@generate
+def query_join():
+    node = yield query_terminal
+
+    while True:
+        res = yield spaced("JOIN").optional()
+        if res == None:
+            break
+        right = yield query_terminal
+        yield spaced("ON")
+        condition = yield expr
+        yield spaced("AS")
+        output_table_name = yield t_name
+
+        node = QueryJoin(node, right, condition, output_table_name)
+
+    return node
+
+
+def query_terminal_kind(stream, index: int) -> str:
+    """Like query.query_terminal_kind, from the token at index"""
+    previous = stream[index - 1] if index > 0 else None
+    if (previous is None or previous.kind is TokenKind.PUNCT and previous.value == "(") \
+            and space_before(stream, index):
+        # Whitespace at the start of the input or after a '(' is only
+        # skipped by query_select
+        return "select"
+    token = stream[index]
+    if token.kind is TokenKind.PUNCT and token.value == "(":
+        return "paren"
+    word = token.value
+    if token.kind is TokenKind.WORD and word.find('.') == -1 and word not in keywords:
+        return "table"
+    return "select"
+
+
+@Parser
+def query_terminal(stream, index):
+    if index >= len(stream):
+        return Result.failure(index, "query")
+    return query_terminals[query_terminal_kind(stream, index)](stream, index)
+
+
+@generate
+def query_table():
+    table_name = yield t_name
+    output_table_name = None
+    as_token = yield spaced("AS").optional()
+    if as_token != None:
+        output_table_name = yield t_name
+    return QueryTable(table_name, output_table_name)
+
+
+@generate
+def query_select():
+    yield keyword("SELECT") << gap
+    expressions = yield s_expr.sep_by(comma, min=1)
+    yield spaced("FROM")
+    from_query = yield query
+
+    condition = None
+    where_token = yield spaced("WHERE").optional()
+    if where_token != None:
+        condition = yield expr
+
+    groupby_exprs = None
+    having_condition = None
+    groupby_token = yield (spaced("GROUP") >> keyword("BY") << gap).optional()
+    if groupby_token != None:
+        groupby_exprs = yield expr.sep_by(comma, min=1)
+
+        having_token = yield spaced("HAVING").optional()
+        if having_token != None:
+            having_condition = yield expr
+
+    return QuerySelect(expressions, from_query, condition, groupby_exprs, having_condition)
+
+
+query_terminals = {
+    "table": query_table,
+    "select": query_select,
+    "paren": lparen >> query << no_gap << rparen,
+}
+
+
+@generate
+def table_element():
+    column_name = yield identifier << gap
+    type_str = yield type_literal
+
+    return TableElement(column_name, BaseType(type_str))
+
+
+@generate
+def stmt_create_table():
+    yield keyword("CREATE") << gap >> keyword("TABLE") << gap
+    table_name = yield t_name
+    yield lparen
+    table_elements = yield table_element.sep_by(comma, min=1)
+    yield rparen
+    return StmtCreateTable(table_name, table_elements)
+
+
+@generate
+def stmt_query():
+    node = yield query
+    return StmtQuery(node)
+
+
+stmt = stmt_create_table | stmt_query
+
+
+@generate
+def stmt_sequence():
+    stmts = yield stmt.sep_by(semicolon, min=1) << (no_gap >> semicolon).optional()
+    return StmtSequence(stmts)
+
+
+def parse_tokens(sql: str) -> StmtSequence:
+    """Tokenizes sql and parses the tokens as a statement sequence"""
+    tokens = tokenize(sql)
+    try:
+        return stmt_sequence.parse(tokens)
+    except ParseError as e:
+        # Report the character offset rather than the token index
+        index = tokens[e.index].start if e.index < len(tokens) else len(sql)
+        raise ParseError(e.expected, sql, index) from None
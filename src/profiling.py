@@ -0,0 +1,151 @@
+"""Timers and counters for finding where type checking spends its time.
+
+Nothing is instrumented until Profiler.install() (or entering the profiler
+as a context manager) wraps the profiled functions in place, and
+uninstall() puts the originals back, so with profiling off the checker runs
+exactly the code it always does.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import functools
+import itertools
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from src.parsing.expr import Expr, ExprColumn
+from src.parsing.statements import Stmt
+from src.types.symbol_table import SymbolTable
+from src.types.types import Schema, expand_stats, simplify_stats
+
+
+@dataclass
+class PhaseStats():
+    calls: int = 0
+    # Only the outermost of recursive calls is timed
+    seconds: float = 0.0
+
+
+@dataclass
+class StatementTiming():
+    index: int
+    kind: str
+    parse_seconds: float
+    type_check_seconds: float
+
+
+# (owner, attribute, phase name) of every function the profiler wraps
+profiled_functions: List[Tuple[type, str, str]] = [
+    (Schema, "concat", "Schema.concat"),
+    (Schema, "expand", "Schema.expand"),
+    (Schema, "simplify", "Schema.simplify"),
+    (Expr, "aggregation_status", "Expr.aggregation_status"),
+    (ExprColumn, "type_check", "column resolution"),
+    (SymbolTable, "__getitem__", "table lookup"),
+]
+
+
+@dataclass
+class Profiler():
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+    statements: List[StatementTiming] = field(default_factory=list)
+    _depth: Counter = field(default_factory=Counter, init=False, repr=False)
+    _originals: List[Tuple[type, str, object]] = field(
+        default_factory=list, init=False, repr=False)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        stats = self.phases.setdefault(name, PhaseStats())
+        stats.calls += 1
+        self._depth[name] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] -= 1
+            if self._depth[name] == 0:
+                stats.seconds += time.perf_counter() - start
+
+    def _timed(self, name: str, function: Callable) -> Callable:
+        # Same accounting as timer, without a generator per call
+        stats = self.phases.setdefault(name, PhaseStats())
+        depth = self._depth
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            stats.calls += 1
+            depth[name] += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                depth[name] -= 1
+                if depth[name] == 0:
+                    stats.seconds += time.perf_counter() - start
+        return timed
+
+    def install(self):
+        expand_stats.reset()
+        simplify_stats.reset()
+        for owner, attribute, name in profiled_functions:
+            original = owner.__dict__[attribute]
+            self._originals.append((owner, attribute, original))
+            if isinstance(original, classmethod):
+                setattr(owner, attribute,
+                        classmethod(self._timed(name, original.__func__)))
+            else:
+                setattr(owner, attribute, self._timed(name, original))
+
+    def uninstall(self):
+        while self._originals:
+            owner, attribute, original = self._originals.pop()
+            setattr(owner, attribute, original)
+
+    def __enter__(self) -> "Profiler":
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def type_check(self, stmts: Iterable[Stmt], st: SymbolTable) -> Tuple[str, Schema]:
+        """type_check_stmts, timing each statement. If stmts parses lazily,
+        as iter_statements does, the parse of each statement is timed too."""
+        table_name = ""
+        schema = Schema({})
+        iterator = iter(stmts)
+        parse_stats = self.phases.setdefault("parse", PhaseStats())
+        type_check_stats = self.phases.setdefault("type_check", PhaseStats())
+        for index in itertools.count():
+            start = time.perf_counter()
+            stmt = next(iterator, None)
+            parse_seconds = time.perf_counter() - start
+            if stmt is None:
+                break
+            parse_stats.calls += 1
+            parse_stats.seconds += parse_seconds
+            timing = StatementTiming(index, type(stmt).__name__, parse_seconds, 0.0)
+            self.statements.append(timing)
+            type_check_stats.calls += 1
+            start = time.perf_counter()
+            try:
+                table_name, schema = stmt.type_check(st)
+            finally:
+                timing.type_check_seconds = time.perf_counter() - start
+                type_check_stats.seconds += timing.type_check_seconds
+        return table_name, schema
+
+    def report(self) -> str:
+        lines = [f"{'statement':>10}  {'kind':<20}{'parse ms':>12}{'check ms':>12}"]
+        for timing in self.statements:
+            lines.append(f"{timing.index:>10}  {timing.kind:<20}"
+                         f"{timing.parse_seconds * 1e3:>12.3f}"
+                         f"{timing.type_check_seconds * 1e3:>12.3f}")
+        lines.append("")
+        lines.append(f"{'phase':<26}{'calls':>10}{'ms':>12}")
+        for name, stats in self.phases.items():
+            lines.append(f"{name:<26}{stats.calls:>10}{stats.seconds * 1e3:>12.3f}")
+        lines.append("")
+        lines.append(f"Schema.expand cache hit rate   {expand_stats.hit_rate():.1%}")
+        lines.append(f"Schema.simplify cache hit rate {simplify_stats.hit_rate():.1%}")
+        return "\n".join(lines)
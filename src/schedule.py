@@ -0,0 +1,198 @@
+"""Type checks the statements of a sequence concurrently.
+
+Only CREATE TABLE writes to the catalog; a query reads the tables it names
+(and, for set operations, which names are taken) and writes nothing. So
+the dependency graph of a sequence only has edges from a CREATE TABLE to
+the later statements reading its table, and queries never depend on each
+other. The scheduler runs the cheap CREATE TABLEs in order in the calling
+process and sends each query to a worker as soon as it is reached, with
+the schemas it reads as they are at its position. Every worker has a copy
+of the starting catalog, sent once when it starts, or opens the catalog
+file it was loaded from.
+
+The result, the first error in source order, and the tables left in the
+symbol table are the same as for StmtSequence.type_check.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+import itertools
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from src.parsing.query import (Query, QueryJoin, QuerySelect,
+                               QuerySetOperation, QueryTable)
+from src.parsing.statements import (Stmt, StmtCreateTable, StmtQuery,
+                                    type_check_stmts)
+from src.types.catalog import open_any_catalog
+from src.types.symbol_table import SymbolTable
+from src.types.types import Schema
+
+
+@dataclass
+class StmtAccess():
+    reads: Set[str] = field(default_factory=set)
+    writes: Set[str] = field(default_factory=set)
+    # The statement may read any name
+    reads_all: bool = False
+
+
+def _add_query_access(query: Query, access: StmtAccess):
+    if isinstance(query, QueryTable):
+        access.reads.add(query.table_name)
+        if query.output_table_name is not None:
+            # Checked for redefinition
+            access.reads.add(query.output_table_name)
+    elif isinstance(query, QueryJoin):
+        # The join condition only sees the two joined tables
+        _add_query_access(query.left, access)
+        _add_query_access(query.right, access)
+    elif isinstance(query, QuerySelect):
+        _add_query_access(query.from_query, access)
+    elif isinstance(query, QuerySetOperation):
+        for branch in query.queries:
+            _add_query_access(branch, access)
+        # The result name is the first one not taken
+        access.reads_all = True
+    else:
+        access.reads_all = True
+
+
+def statement_access(stmt: Stmt) -> Optional[StmtAccess]:
+    """The names stmt reads and writes, or None if that is not known"""
+    if isinstance(stmt, StmtCreateTable):
+        return StmtAccess({stmt.table_name}, {stmt.table_name})
+    if isinstance(stmt, StmtQuery):
+        access = StmtAccess()
+        _add_query_access(stmt.query, access)
+        return access
+    return None
+
+
+_worker_catalog = SymbolTable()
+
+
+def _init_worker(catalog: Dict[str, Schema], catalog_path: Optional[str]):
+    global _worker_catalog
+    if catalog_path is None:
+        _worker_catalog = SymbolTable(catalog)
+    else:
+        _worker_catalog = open_any_catalog(catalog_path)
+
+
+class _WorkerError(Exception):
+    """Carries an error back from a worker. The type checking errors take
+    other arguments than they pass on to Exception, so they cannot be
+    unpickled themselves."""
+
+    def __init__(self, error_type: type, args: tuple, attributes: dict):
+        super().__init__(error_type, args, attributes)
+
+    def rebuild(self) -> Exception:
+        error_type, args, attributes = self.args
+        error = error_type.__new__(error_type)
+        error.args = args
+        error.__dict__.update(attributes)
+        return error
+
+
+def _check_query(stmt: Stmt, visible: Dict[str, Schema]) -> Tuple[str, Schema]:
+    try:
+        return stmt.type_check(SymbolTable(visible, _worker_catalog))
+    except Exception as e:
+        raise _WorkerError(type(e), e.args, e.__dict__) from None
+
+
+def type_check_parallel(stmts: Iterable[Stmt], st: SymbolTable, jobs: Optional[int] = None,
+                        catalog_path: Optional[str] = None) -> Tuple[str, Schema]:
+    """Same as type_check_stmts(stmts, st), checking queries in jobs worker
+    processes (one per core if None). If st was opened from the catalog
+    file at catalog_path, and not changed since, the workers open the file
+    too instead of being sent all of its tables."""
+    if jobs is not None and jobs <= 1:
+        return type_check_stmts(stmts, st)
+    catalog = dict(st) if catalog_path is None else {}
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(catalog, catalog_path))
+    with executor:
+        return _schedule(stmts, st, executor)
+
+
+def _schedule(stmts: Iterable[Stmt], st: SymbolTable, executor: ProcessPoolExecutor) -> Tuple[str, Schema]:
+    # Tables created by the sequence so far, on top of st
+    created = st.child()
+    # Statement each table was created by, to apply to st up to the first error
+    created_by: Dict[str, int] = {}
+    results: Dict[int, "Future[Tuple[str, Schema]]"] = {}
+    inline_results: Dict[int, Tuple[str, Schema]] = {}
+    error: Optional[Tuple[int, BaseException]] = None
+    count = 0
+
+    statements = iter(stmts)
+    for i in itertools.count():
+        try:
+            stmt = next(statements)
+        except StopIteration:
+            break
+        except Exception as e:
+            # stmts may be parsed lazily, so a syntax error is raised here.
+            # It comes after the errors of the queries before it.
+            error = (i, e)
+            break
+        count = i + 1
+        access = statement_access(stmt)
+        if access is not None and not access.writes:
+            if access.reads_all:
+                visible = dict(created.data)
+            else:
+                visible = {name: created.data[name]
+                           for name in access.reads if name in created.data}
+            results[i] = executor.submit(_check_query, stmt, visible)
+            continue
+
+        if access is None:
+            # Unknown statements may read anything, including the results
+            # of the queries before them
+            error = _first_error(results)
+            if error is not None:
+                break
+        try:
+            inline_results[i] = stmt.type_check(created)
+        except Exception as e:
+            error = (i, e)
+            break
+        for name in created.data:
+            created_by.setdefault(name, i)
+
+    query_error = _first_error(results, error[0] if error is not None else None)
+    if query_error is not None:
+        error = query_error
+
+    stop = error[0] if error is not None else count
+    for name, i in created_by.items():
+        if i < stop:
+            st[name] = created.data[name]
+    if error is not None:
+        raise error[1]
+    if count == 0:
+        return "", Schema({})
+    last = count - 1
+    if last in inline_results:
+        return inline_results[last]
+    return results[last].result()
+
+
+def _first_error(results: Dict[int, "Future[Tuple[str, Schema]]"], before: Optional[int] = None) -> Optional[Tuple[int, BaseException]]:
+    """Waits for the queries before index before, in source order, and
+    returns the first one's error. Later queries are cancelled."""
+    for i in sorted(results):
+        if before is not None and i >= before:
+            results[i].cancel()
+            continue
+        e = results[i].exception()
+        if isinstance(e, _WorkerError):
+            e = e.rebuild()
+        if e is not None:
+            for later in results:
+                if later > i:
+                    results[later].cancel()
+            return (i, e)
+    return None
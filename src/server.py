@@ -0,0 +1,110 @@
+"""Long-running type checking server with a resident catalog.
+
+Requests and responses are JSON objects, one per line, either on
+stdin/stdout or over a Unix socket. A request is
+
+    {"id": 1, "sql": "SELECT ..."}                 type check sql
+    {"id": 2, "file": "query.sql"}                 type check a file
+    {"id": 3, "command": "load", "sql": "CREATE TABLE ..."}
+                                                   add tables to the catalog
+
+and the response echoes the id with either {"ok": true, "table": ...,
+"schema": {field: type}} or {"ok": false, "error": ..., "message": ...}.
+Every check runs in its own child scope of the catalog, so CREATE TABLE
+statements in one request are not visible to the next.
+"""
+import json
+import os
+import socketserver
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+from src.parsing.cache import ParseCache
+from src.types.symbol_table import SymbolTable
+from src.types.types import Schema
+
+
+def schema_to_json(schema: Schema) -> Dict[str, str]:
+    return {field: base_type.value for field, base_type in schema.fields.items()}
+
+
+class TypeCheckServer():
+    def __init__(self, catalog: Optional[SymbolTable] = None, cache: Optional[ParseCache] = None):
+        self.catalog = catalog if catalog is not None else SymbolTable()
+        self.cache = cache if cache is not None else ParseCache()
+
+    def load(self, sql: str):
+        """Type checks sql into the resident catalog"""
+        self.cache.parse(sql).type_check(self.catalog)
+
+    def check(self, sql: str):
+        return self.cache.parse(sql).type_check(self.catalog.child())
+
+    def handle(self, request: Any) -> Dict[str, Any]:
+        response: Dict[str, Any] = {}
+        try:
+            if not isinstance(request, dict):
+                raise TypeError("Request must be a JSON object")
+            if "id" in request:
+                response["id"] = request["id"]
+            sql = request.get("sql")
+            if sql is None:
+                with open(request["file"]) as f:
+                    sql = f.read()
+            command = request.get("command", "check")
+            if command == "load":
+                self.load(sql)
+                response["ok"] = True
+            elif command == "check":
+                table_name, schema = self.check(sql)
+                response.update(ok=True, table=table_name,
+                                schema=schema_to_json(schema))
+            else:
+                raise ValueError(f"Unknown command {command}")
+        except Exception as e:
+            # A bad request must not take down the server
+            response.update(ok=False, error=type(e).__name__, message=str(e))
+        return response
+
+    def serve_lines(self, lines: Iterable[str], output: TextIO):
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"ok": False, "error": type(e).__name__,
+                            "message": str(e)}
+            else:
+                response = self.handle(request)
+            output.write(json.dumps(response) + "\n")
+            output.flush()
+
+    def unix_server(self, path: str) -> socketserver.UnixStreamServer:
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lines = (line.decode() for line in self.rfile)
+                server.serve_lines(lines, _SocketWriter(self.wfile))
+
+        if os.path.exists(path):
+            os.unlink(path)
+        return socketserver.UnixStreamServer(path, Handler)
+
+    def serve_unix(self, path: str):
+        with self.unix_server(path) as unix_server:
+            try:
+                unix_server.serve_forever()
+            finally:
+                os.unlink(path)
+
+
+class _SocketWriter():
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text: str):
+        self.wfile.write(text.encode())
+
+    def flush(self):
+        self.wfile.flush()
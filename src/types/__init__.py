@@ -1 +1 @@
-__all__ = ["symbol_table", "types"]
+__all__ = ["catalog", "sqlite_catalog", "symbol_table", "types"]
@@ -0,0 +1,180 @@
+"""Compact on-disk catalog whose tables are decoded on first lookup.
+
+Layout, all integers little-endian:
+
+    header   magic b"SQLCATLG", format version u32, table count u32
+    index    per table, sorted by UTF-8 name: name offset u32, name
+             length u32, record offset u32
+    records  per table: its name, then column count u32 and per column
+             name length u16, type code u8 and name
+
+Opening a catalog only maps the file. A lookup binary searches the index
+and decodes just that table's columns, so a run touching a handful of
+tables costs the same whatever the size of the catalog.
+"""
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterator, Mapping, MutableMapping, Optional, Set, Union
+
+from src.types.sqlite_catalog import is_sqlite_file, load_sqlite_catalog
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, Schema, Type
+
+MAGIC = b"SQLCATLG"
+# Bumped whenever the layout or the type codes change
+CATALOG_FORMAT_VERSION = 1
+
+_header = struct.Struct("<8sII")
+_index_entry = struct.Struct("<III")
+_column_count = struct.Struct("<I")
+_column = struct.Struct("<HB")
+
+_types = list(BaseType)
+_type_codes = {base_type: code for code, base_type in enumerate(_types)}
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def encode_catalog(tables: Mapping[str, Type]) -> bytes:
+    names = sorted(tables, key=lambda name: name.encode())
+    records = bytearray()
+    index = bytearray()
+    start = _header.size + _index_entry.size * len(names)
+    for name in names:
+        schema = tables[name]
+        if not isinstance(schema, Schema):
+            raise TypeError(f"{name} is not a table")
+        encoded_name = name.encode()
+        name_offset = start + len(records)
+        records += encoded_name
+        index += _index_entry.pack(name_offset, len(encoded_name), start + len(records))
+        records += _column_count.pack(len(schema.names))
+        for column, base_type in zip(schema.names, schema.types):
+            encoded_column = column.encode()
+            records += _column.pack(len(encoded_column), _type_codes[base_type])
+            records += encoded_column
+    return _header.pack(MAGIC, CATALOG_FORMAT_VERSION, len(names)) + index + records
+
+
+def write_catalog(path: str, tables: Mapping[str, Type]):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(encode_catalog(tables))
+    os.replace(temp_path, path)
+
+
+class CatalogData(MutableMapping):
+    """The tables of an encoded catalog, plus the ones defined after it was
+    opened. Tables are decoded once, on first lookup."""
+
+    def __init__(self, buffer: Buffer):
+        if len(buffer) < _header.size:
+            raise ValueError("not a catalog file")
+        magic, version, self.count = _header.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a catalog file")
+        if version != CATALOG_FORMAT_VERSION:
+            raise ValueError(f"unsupported catalog format version {version}")
+        self.buffer = buffer
+        # Decoded and newly defined tables
+        self.tables: Dict[str, Type] = {}
+        # Tables of the file that have been deleted
+        self.removed: Set[str] = set()
+
+    def _name(self, i: int) -> bytes:
+        name_offset, name_length, _ = _index_entry.unpack_from(
+            self.buffer, _header.size + i * _index_entry.size)
+        return self.buffer[name_offset:name_offset + name_length]
+
+    def _find(self, name: str) -> Optional[int]:
+        """Offset of the record of table name in the file, if there is one"""
+        if name in self.removed:
+            return None
+        encoded_name = name.encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < encoded_name:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count or self._name(low) != encoded_name:
+            return None
+        return _index_entry.unpack_from(
+            self.buffer, _header.size + low * _index_entry.size)[2]
+
+    def _decode(self, offset: int) -> Schema:
+        buffer = self.buffer
+        count, = _column_count.unpack_from(buffer, offset)
+        offset += _column_count.size
+        names = []
+        types = []
+        for _ in range(count):
+            length, code = _column.unpack_from(buffer, offset)
+            offset += _column.size
+            names.append(sys.intern(bytes(buffer[offset:offset + length]).decode()))
+            types.append(_types[code])
+            offset += length
+        return Schema.from_unique(tuple(names), tuple(types))
+
+    def __getitem__(self, name: str) -> Type:
+        table = self.tables.get(name)
+        if table is not None:
+            return table
+        offset = self._find(name)
+        if offset is None:
+            raise KeyError(name)
+        table = self.tables[name] = self._decode(offset)
+        return table
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.tables or (isinstance(name, str) and self._find(name) is not None)
+
+    def __setitem__(self, name: str, table: Type):
+        self.tables[name] = table
+        self.removed.discard(name)
+
+    def __delitem__(self, name: str):
+        if name not in self:
+            raise KeyError(name)
+        self.tables.pop(name, None)
+        self.removed.add(name)
+
+    def __iter__(self) -> Iterator[str]:
+        in_file = set()
+        for i in range(self.count):
+            name = self._name(i).decode()
+            if name not in self.removed:
+                in_file.add(name)
+                yield name
+        for name in list(self.tables):
+            if name not in in_file:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class MappedCatalog(SymbolTable):
+    """A symbol table backed by an encoded catalog. Child scopes look names
+    up through its data, so they see the catalog's tables too."""
+
+    def __init__(self, buffer: Buffer):
+        super().__init__()
+        self.data = CatalogData(buffer)
+
+
+def open_catalog(path: str) -> MappedCatalog:
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file is closed
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return MappedCatalog(buffer)
+
+
+def open_any_catalog(path: str) -> SymbolTable:
+    """open_catalog, or load_sqlite_catalog if path is a SQLite database"""
+    if is_sqlite_file(path):
+        return load_sqlite_catalog(path)
+    return open_catalog(path)
@@ -0,0 +1,73 @@
+"""Loads the tables of a SQLite database straight into a SymbolTable.
+
+All columns of all tables are read with a single query joining
+sqlite_master with the pragma_table_info table-valued function, giving the
+tables in creation order and their columns in declaration order. Each
+declared type is mapped to a BaseType by SQLite's own affinity rules.
+"""
+import os
+import sqlite3
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, RedefinedNameError, Schema
+
+SQLITE_MAGIC = b"SQLite format 3\0"
+
+_columns_query = """
+    SELECT m.name, p.name, p.type
+    FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\'
+    ORDER BY m.rowid, p.cid
+"""
+
+
+def is_sqlite_file(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def base_type(declared_type: str) -> Optional[BaseType]:
+    """The BaseType of a column with declared_type, following the order of
+    SQLite's affinity rules, or None if there is none (REAL and BLOB
+    affinity, and NUMERIC other than BOOLEAN)"""
+    declared_type = declared_type.upper()
+    if "INT" in declared_type:
+        return BaseType.INT
+    if "CHAR" in declared_type or "CLOB" in declared_type or "TEXT" in declared_type:
+        return BaseType.VARCHAR
+    if "BOOL" in declared_type:
+        return BaseType.BOOL
+    return None
+
+
+def load_sqlite_catalog(path: str, st: Optional[SymbolTable] = None) -> SymbolTable:
+    """Adds the tables of the SQLite database at path to st, or to a new
+    SymbolTable. Raises ValueError for a column without a matching type, and
+    RedefinedNameError for a table already in st, like CREATE TABLE."""
+    if st is None:
+        st = SymbolTable()
+    # Read-only, so a mistyped path is an error rather than a new database
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    connection = sqlite3.connect(uri, uri=True)
+    try:
+        rows = connection.execute(_columns_query).fetchall()
+    finally:
+        connection.close()
+
+    tables: Dict[str, Dict[str, BaseType]] = {}
+    types: Dict[str, Optional[BaseType]] = {}
+    for table_name, column_name, declared_type in rows:
+        if declared_type not in types:
+            types[declared_type] = base_type(declared_type)
+        column_type = types[declared_type]
+        if column_type is None:
+            raise ValueError(f"{table_name}.{column_name}: unsupported type "
+                             f"{declared_type or 'none'}")
+        tables.setdefault(table_name, {})[column_name] = column_type
+    for table_name, fields in tables.items():
+        if table_name in st:
+            raise RedefinedNameError(table_name)
+        st[table_name] = Schema(fields)
+    return st
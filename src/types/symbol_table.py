@@ -1,9 +1,81 @@
-from collections import UserDict
 from dataclasses import dataclass
+from typing import Dict, Iterator, Mapping, MutableMapping, Optional
 
 from src.types.types import Type
 
 @dataclass
-class SymbolTable(UserDict):
-    def __init__(self, data={}):
-        super().__init__(data)
+class SymbolTable(MutableMapping):
+    """Names in scope. A child scope only stores the names defined in it and
+    falls back to its parent for lookups, so creating one copies nothing.
+    Parents should not be modified while they have children in use."""
+
+    def __init__(self, data: Optional[Mapping[str, Type]] = None, parent: Optional["SymbolTable"] = None):
+        self.parent = parent
+        # Per-prefix index below which every `prefix_i` is known to be taken
+        self.name_counters: Dict[str, int] = {}
+        # Names defined in this scope. Any mapping will do, so that it can
+        # be backed by something other than a dict, like a catalog file.
+        self.data: MutableMapping = dict(data) if data is not None else {}
+
+    def child(self, data: Optional[Mapping[str, Type]] = None) -> "SymbolTable":
+        return SymbolTable(data, self)
+
+    def __getitem__(self, key):
+        scope: Optional[SymbolTable] = self
+        while scope is not None:
+            if key in scope.data:
+                return scope.data[key]
+            scope = scope.parent
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        scope: Optional[SymbolTable] = self
+        while scope is not None:
+            if key in scope.data:
+                return True
+            scope = scope.parent
+        return False
+
+    def __iter__(self) -> Iterator[str]:
+        if self.parent is None:
+            return iter(self.data)
+        return self._iter_scopes()
+
+    def _iter_scopes(self) -> Iterator[str]:
+        seen = set()
+        scope: Optional[SymbolTable] = self
+        while scope is not None:
+            for key in scope.data:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+            scope = scope.parent
+
+    def __len__(self) -> int:
+        if self.parent is None:
+            return len(self.data)
+        return sum(1 for _ in self._iter_scopes())
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        # Only names defined in this scope can be removed. A freed name may
+        # be below a counter, so start the search over.
+        self.name_counters.clear()
+        del self.data[key]
+
+    def fresh_name(self, prefix: str) -> str:
+        """Returns prefix, or the first of prefix_0, prefix_1, ... that is not
+        in the table. Names are never removed while counters are kept, so each
+        candidate is tested at most once across calls and the search stops
+        after at most len(self) + 1 tests."""
+        if prefix not in self:
+            return prefix
+        i = self.name_counters.get(prefix, 0)
+        name = f"{prefix}_{i}"
+        while name in self:
+            i += 1
+            name = f"{prefix}_{i}"
+        self.name_counters[prefix] = i
+        return name
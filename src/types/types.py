@@ -2,12 +2,12 @@ from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from operator import truediv
-from typing import DefaultDict, Dict, Tuple
+import sys
+from typing import DefaultDict, Dict, Iterator, List, Mapping, Optional, Tuple
 
 
 class Type:
-    pass
+    __slots__ = ()
 
 
 class BaseType(Type, Enum):
@@ -19,90 +19,248 @@ class BaseType(Type, Enum):
 TableFieldPair = Tuple[str, str]
 
 
-@dataclass
+_qualified_names: Dict[str, Dict[str, str]] = {}
+_unqualified_names: Dict[str, str] = {}
+
+
+def qualified_name(table_name: str, field: str) -> str:
+    """Interned `table_name.field`, built once per pair"""
+    table_names = _qualified_names.get(table_name)
+    if table_names is None:
+        table_names = _qualified_names[table_name] = {}
+    name = table_names.get(field)
+    if name is None:
+        name = table_names[field] = sys.intern(f"{table_name}.{field}")
+    return name
+
+
+def unqualified_name(field: str) -> str:
+    """field without its table prefix, if it has one"""
+    name = _unqualified_names.get(field)
+    if name is None:
+        name = _unqualified_names[field] = sys.intern(field.split(".", 1)[-1])
+    return name
+
+
+class SchemaFields(Mapping):
+    """Read-only name -> type view of a Schema, in field order"""
+    __slots__ = ("schema",)
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+
+    def __getitem__(self, name: str) -> BaseType:
+        return self.schema.types[self.schema.index[name]]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.schema.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.names)
+
+    def __len__(self) -> int:
+        return len(self.schema.names)
+
+    def items(self):
+        return zip(self.schema.names, self.schema.types)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SchemaFields):
+            return self.schema == other.schema
+        return dict(self.items()) == other
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
 class Schema(Type):
-    fields: Dict[str, BaseType]
+    """Immutable record type: parallel tuples of interned field names and
+    their types, with a precomputed name -> position index.
+
+    Equality ignores field order, like comparing the fields as dicts.
+    """
+    __slots__ = ("names", "types", "index", "_hash", "_fields",
+                 "_expanded", "_simplified")
+
+    def __init__(self, fields: Dict[str, BaseType]):
+        self.names: Tuple[str, ...] = tuple(sys.intern(name) for name in fields)
+        self.types: Tuple[BaseType, ...] = tuple(fields.values())
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self._hash: Optional[int] = None
+        self._fields: Optional[SchemaFields] = None
+        self._expanded: Optional[Dict[str, Schema]] = None
+        self._simplified: Optional[Schema] = None
+
+    @classmethod
+    def from_unique(cls, names: Tuple[str, ...], types: Tuple[BaseType, ...]) -> Schema:
+        """Builds a schema from interned names that are known to be unique"""
+        schema = cls.__new__(cls)
+        schema.names = names
+        schema.types = types
+        schema.index = {name: i for i, name in enumerate(names)}
+        schema._hash = None
+        schema._fields = None
+        schema._expanded = None
+        schema._simplified = None
+        return schema
+
+    @property
+    def fields(self) -> SchemaFields:
+        if self._fields is None:
+            self._fields = SchemaFields(self)
+        return self._fields
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Schema):
+            return NotImplemented
+        if self.names == other.names:
+            return self.types == other.types
+        if len(self.names) != len(other.names):
+            return False
+        return other.is_subtype(self)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(frozenset(zip(self.names, self.types)))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"Schema(fields={self.fields!r})"
+
+    def __reduce__(self):
+        return (Schema, (dict(self.fields.items()),))
 
     def is_subtype(self, other: Schema) -> bool:
-        for field_name, field_type in other.fields.items():
-            if field_name not in self.fields or self.fields[field_name] != field_type:
+        index = self.index
+        types = self.types
+        for field_name, field_type in zip(other.names, other.types):
+            i = index.get(field_name)
+            if i is None or types[i] != field_type:
                 return False
         return True
 
     @classmethod
     def concat(cls, left: Schema, right: Schema, keep_all=False):
+        # Nothing can clash with an empty schema
+        if not right.names:
+            return left
+        if not left.names:
+            return right
+        if left.index.keys().isdisjoint(right.names):
+            return Schema.from_unique(left.names + right.names, left.types + right.types)
+
         new_fields = {}
 
         total_field_name_counts: DefaultDict[str, int] = defaultdict(int)
         current_field_name_counts: DefaultDict[str, int] = defaultdict(int)
-        for field in left.fields:
+        for field in left.names:
             total_field_name_counts[field] += 1
-        for field in right.fields:
+        for field in right.names:
             total_field_name_counts[field] += 1
 
-        for field in left.fields:
+        for field, field_type in zip(left.names, left.types):
             if keep_all and total_field_name_counts[field] > 1:
                 current_field_name_counts[field] += 1
-                new_fields[f"{field}_{current_field_name_counts[field]}"] = left.fields[field]
+                new_fields[f"{field}_{current_field_name_counts[field]}"] = field_type
             else:
-                new_fields[field] = left.fields[field]
-        for field in right.fields:
+                new_fields[field] = field_type
+        for field, field_type in zip(right.names, right.types):
             if total_field_name_counts[field] > 1:
                 if keep_all:
                     current_field_name_counts[field] += 1
-                    new_fields[f"{field}_{current_field_name_counts[field]}"] = right.fields[field]
-                elif new_fields[field] != right.fields[field]:
+                    new_fields[f"{field}_{current_field_name_counts[field]}"] = field_type
+                elif new_fields[field] != field_type:
                     raise SchemaConcatConflictError(
-                        field, new_fields[field], right.fields[field])
+                        field, new_fields[field], field_type)
             else:
-                new_fields[field] = right.fields[field]
+                new_fields[field] = field_type
 
         return Schema(new_fields)
 
     @classmethod
     def equals(cls, left, right):
-        # dictionnaries are ordered
-        leftlist = list(left.fields.items())
-        rightlist = list(right.fields.items())
-        
-        if len(leftlist) != len(rightlist):
-            return False
-
-        for i in range (0, len(leftlist)):
-            if leftlist[i][1] != rightlist[i][1]:
-                return False
-        return True
+        # Field names are ignored, only the types are compared in order
+        return left.types == right.types
 
     @classmethod
     def merge_fields(cls, left, right):
-        leftlist = list(left.fields.items())
-        rightlist = list(right.fields.items())
         newfields = {}
-        for i in range (0, len(leftlist)):
-            name = leftlist[i][0] + "_" + rightlist[i][0]
-            newfields.update({name: leftlist[i][1]})
+        for left_name, right_name, field_type in zip(left.names, right.names, left.types):
+            newfields[left_name + "_" + right_name] = field_type
+
+        return Schema(newfields)
+
+    @classmethod
+    def merge_all(cls, schemas: List[Schema]) -> Schema:
+        """Same as folding merge_fields over schemas, in a single pass"""
+        if len(schemas) == 1:
+            return schemas[0]
+        newfields = {}
+        for names, field_type in zip(zip(*(schema.names for schema in schemas)), schemas[0].types):
+            newfields["_".join(names)] = field_type
+        if len(newfields) < len(schemas[0].names):
+            # Merged names collided, which the fold handles field by field
+            final_schema = schemas[0]
+            for schema in schemas[1:]:
+                final_schema = Schema.merge_fields(final_schema, schema)
+            return final_schema
 
         return Schema(newfields)
 
     def expand(self, table_name: str) -> Schema:
-        new_fields = {}
-        for field in self.fields:
-            new_fields[f"{table_name}.{field}"] = self.fields[field]
-        return Schema(new_fields)
+        # Schemas are immutable, so results are cached on the instance
+        if self._expanded is None:
+            self._expanded = {}
+        else:
+            expanded = self._expanded.get(table_name)
+            if expanded is not None:
+                expand_stats.hits += 1
+                return expanded
+        expand_stats.misses += 1
+        expanded = Schema.from_unique(
+            tuple(qualified_name(table_name, field) for field in self.names),
+            self.types)
+        self._expanded[table_name] = expanded
+        return expanded
 
     def simplify(self) -> Schema:
-        new_fields = {}
+        if self._simplified is not None:
+            simplify_stats.hits += 1
+            return self._simplified
+        simplify_stats.misses += 1
+        short_names = [unqualified_name(field) for field in self.names]
         field_name_counts: DefaultDict[str, int] = defaultdict(int)
-        for field in self.fields:
-            field_name = field.split(".", 1)[-1]
+        for field_name in short_names:
             field_name_counts[field_name] += 1
-        for field in self.fields:
-            field_name = field.split(".", 1)[-1]
+        new_fields = {}
+        for field, field_name, field_type in zip(self.names, short_names, self.types):
             if field_name_counts[field_name] > 1:
-                new_fields[field] = self.fields[field]
+                new_fields[field] = field_type
             else:
-                new_fields[field_name] = self.fields[field]
-        return Schema(new_fields)
+                new_fields[field_name] = field_type
+        self._simplified = Schema(new_fields)
+        return self._simplified
+
+
+@dataclass
+class CacheStats():
+    hits: int = 0
+    misses: int = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+# Hit counters for the Schema.expand and Schema.simplify caches, for profiling
+expand_stats = CacheStats()
+simplify_stats = CacheStats()
 
 
 @dataclass
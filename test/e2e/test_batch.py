@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             student_create_table_statement)
+
+from src.batch import check_files, expand_paths, load_catalog
+from src.types.catalog import write_catalog
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, RedefinedNameError, Schema
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = {
+            # Whitespace after the final ';', as most editors leave it
+            "schema.ddl": f"{student_create_table_statement}\n{course_create_table_statement}\n",
+            "a.sql": "SELECT c.name FROM course AS c;\n",
+            "b.sql": "SELECT s.nope FROM student AS s",
+            "nested/c.sql": "CREATE TABLE extra (id INT); extra",
+        }
+        for name, contents in self.files.items():
+            path = os.path.join(self.directory.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(contents)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_expand_paths(self):
+        self.assertEqual(
+            expand_paths([self.path("b.sql"), self.directory.name]),
+            [self.path("b.sql"), self.path("a.sql"), self.path("b.sql"),
+             self.path("nested/c.sql")]
+        )
+        self.assertEqual(expand_paths([self.path("*.sql")]),
+                         [self.path("a.sql"), self.path("b.sql")])
+
+    def check(self, jobs: int):
+        catalog = load_catalog([self.path("schema.ddl")])
+        filenames = expand_paths([self.directory.name])
+        results = {os.path.relpath(r.filename, self.directory.name): r
+                   for r in check_files(filenames, catalog, jobs)}
+        self.assertEqual(set(results), {"a.sql", "b.sql", "nested/c.sql"})
+        self.assertEqual(results["a.sql"].result,
+                         ("c", Schema({"name": BaseType.VARCHAR})))
+        self.assertEqual(results["b.sql"].error, "KeyError: 'nope'")
+        self.assertEqual(results["nested/c.sql"].result,
+                         ("extra", Schema({"id": BaseType.INT})))
+
+    def test_load_catalog_on_base(self):
+        base = SymbolTable({"enrolled": Schema({"id": BaseType.INT})})
+        catalog = load_catalog([self.path("schema.ddl")], base)
+        # Only the tables the files define, checked against base
+        self.assertEqual(set(catalog), {"student", "course"})
+        with self.assertRaises(RedefinedNameError):
+            load_catalog([self.path("schema.ddl")], SymbolTable(catalog))
+
+    def test_catalog_file(self):
+        # The workers open the catalog file rather than being sent its tables
+        catalog_path = self.path("schema.catalog")
+        write_catalog(catalog_path, load_catalog([self.path("schema.ddl")]))
+        for jobs in [1, 2]:
+            with self.subTest(jobs=jobs):
+                results = list(check_files([self.path("a.sql")], {}, jobs, catalog_path))
+                self.assertEqual(results[0].result,
+                                 ("c", Schema({"name": BaseType.VARCHAR})))
+
+    def test_serial(self):
+        self.check(jobs=1)
+
+    def test_process_pool(self):
+        self.check(jobs=2)
@@ -0,0 +1,89 @@
+import io
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.client import response_result, send_requests
+from src.server import TypeCheckServer
+from src.types.types import BaseType, Schema
+
+
+def make_server() -> TypeCheckServer:
+    server = TypeCheckServer()
+    server.load(f"""{student_create_table_statement}
+                    {enrolled_create_table_statement}
+                    {course_create_table_statement}""")
+    return server
+
+
+class TestTypeCheckServer(unittest.TestCase):
+    def test_check(self):
+        server = make_server()
+        response = server.handle(
+            {"id": 1, "sql": "SELECT c.name FROM course AS c"})
+        self.assertEqual(response, {"id": 1, "ok": True, "table": "c",
+                                    "schema": {"name": "VARCHAR"}})
+        self.assertEqual(response_result(response),
+                         ("c", Schema({"name": BaseType.VARCHAR})))
+
+    def test_check_does_not_change_catalog(self):
+        server = make_server()
+        self.assertTrue(server.handle(
+            {"sql": "CREATE TABLE extra (id INT); extra"})["ok"])
+        self.assertEqual(server.handle({"sql": "extra"})["error"], "KeyError")
+
+    def test_load(self):
+        server = make_server()
+        self.assertTrue(server.handle(
+            {"command": "load", "sql": "CREATE TABLE extra (id INT)"})["ok"])
+        self.assertEqual(server.handle({"sql": "extra"})["schema"],
+                         {"id": "INT"})
+
+    def test_errors(self):
+        server = make_server()
+        self.assertEqual(server.handle({"sql": "SELECT FROM"})["error"],
+                         "ParseError")
+        self.assertEqual(
+            server.handle({"sql": "SELECT s.name + 1 FROM student AS s"})["error"],
+            "TypeMismatchError")
+        self.assertEqual(server.handle({"file": "/no/such/file.sql"})["error"],
+                         "FileNotFoundError")
+        self.assertEqual(server.handle({"command": "nope", "sql": "a"})["error"],
+                         "ValueError")
+        self.assertEqual(server.handle(1)["error"], "TypeError")
+
+    def test_serve_lines(self):
+        output = io.StringIO()
+        make_server().serve_lines(
+            ['{"id": 1, "sql": "course"}\n', "\n", "{\n", "1\n"], output)
+        responses = output.getvalue().splitlines()
+        self.assertEqual(len(responses), 3)
+        self.assertIn('"id": 1, "ok": true', responses[0])
+        self.assertIn('"ok": false', responses[1])
+        self.assertIn('"ok": false', responses[2])
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+class TestUnixSocket(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "typeck.sock")
+            with make_server().unix_server(path) as unix_server:
+                thread = threading.Thread(target=unix_server.serve_forever)
+                thread.start()
+                try:
+                    responses = send_requests(path, [
+                        {"id": 1, "sql": "SELECT c.name FROM course AS c"},
+                        {"id": 2, "sql": "missing"},
+                    ])
+                finally:
+                    unix_server.shutdown()
+                    thread.join()
+        self.assertEqual([r["id"] for r in responses], [1, 2])
+        self.assertEqual(responses[0]["schema"], {"name": "VARCHAR"})
+        self.assertFalse(responses[1]["ok"])
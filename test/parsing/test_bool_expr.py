@@ -1,5 +1,6 @@
 import unittest
 
+from parsy import ParseError
 from src.parsing.expr import (BinaryOp, ExprBinaryOp, ExprBoolLiteral,
                               ExprColumn, ExprIntLiteral, ExprNot, expr)
 
@@ -304,3 +305,45 @@ class TestColumn(unittest.TestCase):
                 ))
             )
         )
+
+
+class TestPrecedence(unittest.TestCase):
+    def test_not_equality_and(self):
+        self.assertEqual(
+            expr.parse("NOT 1 + 2 * 3 = 4 AND true"),
+            ExprBinaryOp(
+                ExprNot(ExprBinaryOp(
+                    ExprBinaryOp(
+                        ExprIntLiteral(1),
+                        BinaryOp.ADDITION,
+                        ExprBinaryOp(ExprIntLiteral(2),
+                                     BinaryOp.MULTIPLICATION,
+                                     ExprIntLiteral(3))
+                    ),
+                    BinaryOp.EQUALS,
+                    ExprIntLiteral(4)
+                )),
+                BinaryOp.AND,
+                ExprBoolLiteral(True)
+            )
+        )
+
+    def test_comparisons_do_not_chain(self):
+        with self.assertRaises(ParseError):
+            expr.parse("0 = 0 = true")
+        self.assertEqual(
+            expr.parse("0 = 0 AND 1 < 2"),
+            ExprBinaryOp(
+                ExprBinaryOp(ExprIntLiteral(0), BinaryOp.EQUALS,
+                             ExprIntLiteral(0)),
+                BinaryOp.AND,
+                ExprBinaryOp(ExprIntLiteral(1), BinaryOp.LESS_THAN,
+                             ExprIntLiteral(2))
+            )
+        )
+
+    def test_not_only_before_and_operand(self):
+        with self.assertRaises(ParseError):
+            expr.parse("1 + NOT true")
+        with self.assertRaises(ParseError):
+            expr.parse("NOT NOT true")
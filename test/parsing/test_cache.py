@@ -0,0 +1,116 @@
+import os
+import pickle
+import tempfile
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from parsy import ParseError
+from src.parsing.cache import CACHE_FORMAT_VERSION, ParseCache
+from src.parsing.split import split_statements, stripped_statements
+from src.parsing.statements import stmt_sequence
+
+
+class TestSplitStatements(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(split_statements("a; b ;c"),
+                         [(0, "a"), (2, " b "), (6, "c")])
+        self.assertEqual(split_statements("a;"), [(0, "a"), (2, "")])
+
+    def test_split_string_literal(self):
+        self.assertEqual(
+            split_statements('SELECT CONCAT(a.b, ";") FROM a; b'),
+            [(0, 'SELECT CONCAT(a.b, ";") FROM a'), (31, " b")])
+        self.assertEqual(split_statements('a "; b'), [(0, 'a "; b')])
+
+    def test_stripped_statements(self):
+        self.assertEqual(list(stripped_statements("a; b ;\n")),
+                         [(0, "a"), (3, "b")])
+        self.assertEqual(list(stripped_statements(" ; a")), [(0, ""), (3, "a")])
+        self.assertEqual(list(stripped_statements(" ")), [(0, "")])
+        self.assertEqual(list(stripped_statements("\n a; b")), [(0, "\n a"), (5, "b")])
+
+
+class TestParseCache(unittest.TestCase):
+    program = f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        {course_create_table_statement}
+        SELECT s.student_id FROM student AS s WHERE s.alumni = True"""
+
+    def test_same_ast(self):
+        cache = ParseCache()
+        self.assertEqual(cache.parse(TestParseCache.program),
+                         stmt_sequence.parse(TestParseCache.program))
+        self.assertEqual(cache.parse(TestParseCache.program + ";"),
+                         stmt_sequence.parse(TestParseCache.program))
+
+    def test_leading_whitespace(self):
+        # As with stmt_sequence, only SELECT (in any case) and CREATE TABLE
+        # may follow whitespace at the start
+        program = "\nSelect t.a FROM t; t"
+        self.assertEqual(ParseCache().parse(program), stmt_sequence.parse(program))
+        with self.assertRaises(ParseError):
+            ParseCache().parse("\n t")
+
+    def test_hits(self):
+        cache = ParseCache()
+        cache.parse(TestParseCache.program)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        cache.parse(f"""{course_create_table_statement}
+            {student_create_table_statement}
+            student""")
+        self.assertEqual((cache.hits, cache.misses), (2, 5))
+
+    def test_lru_bound(self):
+        cache = ParseCache(max_size=2)
+        cache.parse("a; b; c")
+        self.assertEqual(len(cache), 2)
+        cache.parse("c; a")
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_parse_error_position(self):
+        with self.assertRaises(ParseError) as cm:
+            ParseCache().parse("a;\n  SELECT FROM b")
+        self.assertEqual(cm.exception.line_info(), "1:9")
+        with self.assertRaises(ParseError):
+            ParseCache().parse("a;;b")
+
+    def test_parse_recovering(self):
+        cache = ParseCache()
+        statements, errors = cache.parse_recovering(
+            "a;\n  SELECT FROM b;\nb; ;\nSELECT x + FROM c;\nc;")
+        self.assertEqual(statements, cache.parse("a; b; c"))
+        self.assertEqual([error.line_info() for error in errors],
+                         ["1:9", "2:3", "3:7"])
+        self.assertEqual(cache.parse_recovering(TestParseCache.program),
+                         (cache.parse(TestParseCache.program), []))
+        statements, errors = cache.parse_recovering("SELECT;")
+        self.assertEqual((statements.stmts, len(errors)), ([], 1))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "parse.cache")
+            cache = ParseCache(path=path)
+            cache.parse(TestParseCache.program)
+            cache.save()
+
+            warm_cache = ParseCache(path=path)
+            self.assertEqual(len(warm_cache), 4)
+            self.assertEqual(warm_cache.parse(TestParseCache.program),
+                             stmt_sequence.parse(TestParseCache.program))
+            self.assertEqual((warm_cache.hits, warm_cache.misses), (4, 0))
+
+    def test_stale_version(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "parse.cache")
+            with open(path, "wb") as f:
+                pickle.dump((CACHE_FORMAT_VERSION - 1, {b"key": None}), f)
+            self.assertEqual(len(ParseCache(path=path)), 0)
+
+    def test_corrupt_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "parse.cache")
+            with open(path, "wb") as f:
+                f.write(b"not a pickle")
+            self.assertEqual(len(ParseCache(path=path)), 0)
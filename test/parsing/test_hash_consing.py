@@ -0,0 +1,45 @@
+import copy
+from dataclasses import FrozenInstanceError
+import pickle
+import unittest
+
+from src.parsing.expr import (AggOp, BinaryOp, ExprAgg, ExprBinaryOp,
+                              ExprColumn, ExprIntLiteral, expr)
+from src.types.types import AggregationStatus
+
+
+class TestHashConsing(unittest.TestCase):
+    def test_shared_nodes(self):
+        self.assertIs(ExprColumn(("a", "b")), ExprColumn(("a", "b")))
+        self.assertIs(ExprColumn(table_column_name=("a", "b")),
+                      ExprColumn(("a", "b")))
+        self.assertIs(expr.parse("(a.b + 1) * (a.b + 1)").left,
+                      expr.parse("(a.b + 1) * (a.b + 1)").right)
+        self.assertIsNot(ExprIntLiteral(1), ExprIntLiteral(2))
+
+    def test_set_membership(self):
+        group_by = {ExprColumn(("a", "b")),
+                    ExprBinaryOp(ExprColumn(("a", "c")), BinaryOp.ADDITION,
+                                 ExprIntLiteral(1))}
+        self.assertIn(expr.parse("a.c + 1"), group_by)
+        self.assertNotIn(expr.parse("a.c + 2"), group_by)
+        self.assertEqual(expr.parse("a.b + (a.c + 1)").aggregation_status(group_by),
+                         AggregationStatus.AGGREGATED)
+        self.assertEqual(ExprAgg(AggOp.COUNT, ExprColumn(("a", "d"))).aggregation_status(group_by),
+                         AggregationStatus.AGGREGATED)
+
+    def test_frozen(self):
+        # One node is shared by every occurrence, so it must not change
+        with self.assertRaises(FrozenInstanceError):
+            ExprColumn(("a", "b")).table_column_name = ("a", "c")
+
+    def test_pickle_and_copy(self):
+        node = expr.parse("a.b < 1 AND NOT a.c")
+        self.assertIs(pickle.loads(pickle.dumps(node)), node)
+        self.assertIs(copy.deepcopy(node), node)
+
+    def test_missing_argument(self):
+        with self.assertRaises(TypeError):
+            ExprBinaryOp(ExprIntLiteral(1), BinaryOp.ADDITION)
+        with self.assertRaises(TypeError):
+            ExprIntLiteral(1, extra=2)
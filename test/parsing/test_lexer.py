@@ -0,0 +1,118 @@
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from parsy import ParseError
+from src.parsing import parse_sql_program
+from src.parsing.lexer import Token, TokenKind, tokenize
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize('SELECT s.a, -4 FROM s WHERE s.b = "x y";'),
+            [
+                Token(TokenKind.WORD, "SELECT", 0, 6),
+                Token(TokenKind.WORD, "s.a", 7, 10),
+                Token(TokenKind.PUNCT, ",", 10, 11),
+                Token(TokenKind.INT, "-4", 12, 14),
+                Token(TokenKind.WORD, "FROM", 15, 19),
+                Token(TokenKind.WORD, "s", 20, 21),
+                Token(TokenKind.WORD, "WHERE", 22, 27),
+                Token(TokenKind.WORD, "s.b", 28, 31),
+                Token(TokenKind.PUNCT, "=", 32, 33),
+                Token(TokenKind.VARCHAR, '"x y"', 34, 39),
+                Token(TokenKind.PUNCT, ";", 39, 40),
+            ]
+        )
+
+    def test_tokenize_whitespace(self):
+        self.assertEqual(tokenize(" \n\t "), [])
+        self.assertEqual([t.value for t in tokenize("(1 +2)*3")],
+                         ["(", "1", "+", "2", ")", "*", "3"])
+
+    def test_tokenize_invalid(self):
+        with self.assertRaises(ParseError):
+            tokenize("SELECT s.a FROM s WHERE s.b > 1")
+
+
+def parse_outcome(program: str, lexer: str):
+    try:
+        return parse_sql_program(program, lexer=lexer)
+    except ParseError:
+        return None
+
+
+class TestFastLexer(unittest.TestCase):
+    programs = [
+        "CREATE TABLE students (ssn INT, gpa INT, year INT, graduate BOOL)",
+        f"""{student_create_table_statement}
+            {enrolled_create_table_statement}
+            {course_create_table_statement}
+            student""",
+        "course AS c",
+        "students join enrolled ON students.id = enrolled.id AS s_e",
+        """SELECT s.student_id, CONCAT(s.name, "!"), s.year + -4 AS start_year, not s.graduate as undergraduate
+           FROM student AS s""",
+        "SELECT s.a FROM s WHERE NOT s.b = 1 AND s.c < 2 * (3 + s.d) AND true",
+        "SELECT SUBSTR(s.name, 0, 1 + 1) AS i FROM s WHERE FALSE",
+        """SELECT e.course_id, COUNT(e.student_id), MAX(e.grade) AS best
+           FROM enrolled AS e
+           GROUP BY e.course_id, e.semester
+           HAVING MIN(e.grade) < 50 AND avg(e.grade) = 70""",
+        "(SELECT a.x FROM a) UNION (SELECT b.x FROM b) INTERSECT c",
+        "a UNION b UNION c INTERSECT d",
+        "SELECT j.x FROM a JOIN (SELECT b.y FROM b) ON a.x = b.y AS j",
+        "CREATE TABLE a (b INT); SELECT a.b FROM a;",
+    ]
+
+    def test_same_ast(self):
+        for program in TestFastLexer.programs:
+            self.assertEqual(
+                parse_sql_program(program, lexer="fast"),
+                parse_sql_program(program)
+            )
+
+    def test_same_whitespace_rules(self):
+        # Removes the whitespace before each token, or adds some where
+        # there is none, and expects both grammars to agree on the result
+        programs = TestFastLexer.programs + [
+            "SELECT a.x FROM a WHERE a.x AND(a.y)",
+            "SELECT COUNT(a.x) FROM a GROUP BY a.x",
+            " (SELECT a.x FROM a)",
+            # Table names when there is no whitespace before them
+            "select AS d",
+            "(create)",
+        ]
+        for program in programs:
+            tokens = tokenize(program)
+            previous_ends = [0] + [token.end for token in tokens]
+            for previous_end, token in zip(previous_ends, tokens):
+                if token.start > previous_end:
+                    variant = program[:previous_end] + program[token.start:]
+                else:
+                    variant = program[:token.start] + " " + program[token.start:]
+                with self.subTest(variant=variant):
+                    self.assertEqual(parse_outcome(variant, "fast"),
+                                     parse_outcome(variant, "parsy"))
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            parse_sql_program("SELECT FROM a", lexer="fast")
+        with self.assertRaises(ParseError):
+            parse_sql_program("SELECT COUNT (a.b) FROM a", lexer="fast")
+        with self.assertRaises(ParseError):
+            parse_sql_program("select a.b from a", lexer="fast")
+        for program in ["SELECT a.x FROM a WHERE a.x AND(a.y)",
+                        "SELECT a.x FROM a WHERE(a.x)",
+                        "SELECT COUNT( a.x) FROM a",
+                        "  select",
+                        " select AS d",
+                        "( create)"]:
+            with self.assertRaises(ParseError):
+                parse_sql_program(program, lexer="fast")
+
+    def test_unknown_lexer(self):
+        with self.assertRaises(ValueError):
+            parse_sql_program("a", lexer="slow")
@@ -0,0 +1,43 @@
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from parsy import ParseError
+from src.parsing.cache import ParseCache
+from src.parsing.parallel import parse_parallel, statement_chunks
+
+
+class TestStatementChunks(unittest.TestCase):
+    def test_chunks(self):
+        self.assertEqual(list(statement_chunks(" a; bb ;c;", 2)),
+                         [[(0, " a")], [(4, "bb")], [(8, "c")]])
+        self.assertEqual(list(statement_chunks("", 2)), [[(0, "")]])
+
+
+class TestParseParallel(unittest.TestCase):
+    program = f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        {course_create_table_statement}
+        SELECT s.student_id FROM student AS s WHERE s.alumni = True;
+        SELECT e.grade + 1 FROM enrolled AS e;
+        """
+
+    def test_same_as_cache(self):
+        expected = ParseCache().parse(TestParseParallel.program)
+        for jobs in [1, 2]:
+            for chunk_size in [1, 100, 1 << 16]:
+                with self.subTest(jobs=jobs, chunk_size=chunk_size):
+                    self.assertEqual(
+                        parse_parallel(TestParseParallel.program, jobs, chunk_size),
+                        expected)
+
+    def test_first_error(self):
+        sql = "course; SELECT FROM; SELECT; course"
+        for jobs in [1, 2]:
+            with self.assertRaises(ParseError) as cm:
+                parse_parallel(sql, jobs, 1)
+            with self.assertRaises(ParseError) as expected:
+                ParseCache().parse(sql)
+            self.assertEqual(cm.exception.index, expected.exception.index)
+            self.assertEqual(cm.exception.stream, sql)
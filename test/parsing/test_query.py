@@ -1,9 +1,11 @@
 import unittest
 
 from src.parsing.expr import (BinaryOp, ExprBinaryOp, ExprBoolLiteral,
-                              ExprColumn, ExprIntLiteral, ExprNot)
+                              ExprColumn, ExprIntLiteral, ExprNot,
+                              expr_terminal_kind)
 from src.parsing.query import (QueryIntersect, QueryJoin, QuerySelect,
-                               QueryTable, QueryUnion, query)
+                               QueryTable, QueryUnion, query,
+                               query_terminal_kind)
 from src.parsing.s_expr import SExpr
 
 
@@ -438,3 +440,20 @@ class TestQueryJoin(unittest.TestCase):
                 ExprColumn(("students", "graduate"))
             )
         )
+
+
+class TestTerminalDispatch(unittest.TestCase):
+    def test_expr_terminal_kind(self):
+        cases = [("COUNT(x.y)", "agg"), ("min(x.y)", "agg"), ("x.y", "column"),
+                 ("true.x", "column"), ("TRUE", "bool"), ("-4", "int"),
+                 ('"a"', "varchar"), ("(1)", "paren"), ("CONCAT(", "concat"),
+                 ("SUBSTR(", "substr"), ("x", None), ("NOT", None), (" 1", None)]
+        for text, kind in cases:
+            self.assertEqual(expr_terminal_kind(text, 0), kind)
+
+    def test_query_terminal_kind(self):
+        cases = [("a", "table"), ("select", "table"), ("SELECT", "select"),
+                 (" SELECT", "select"), ("(a)", "paren"), ("a.b", "select"),
+                 ("", None), ("1", None)]
+        for text, kind in cases:
+            self.assertEqual(query_terminal_kind(text, 0), kind)
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.query import query
+from src.parsing.references import ReferenceIndex, StatementReferences
+from src.parsing.statements import stmt
+
+
+class TestStatementReferences(unittest.TestCase):
+    def references(self, sql: str) -> StatementReferences:
+        references = StatementReferences()
+        references.add_query(query.parse(sql))
+        return references
+
+    def test_alias(self):
+        references = self.references(
+            "SELECT s.name FROM student AS s WHERE s.gpa < 3")
+        self.assertEqual(references.tables, {"student"})
+        self.assertEqual(references.columns, {("student", "name"), ("student", "gpa")})
+        self.assertEqual(references.schema_uses, set())
+
+    def test_join(self):
+        references = self.references(
+            """SELECT s_e.student.student_id, s_e.grade
+            FROM student JOIN enrolled ON student.student_id = enrolled.student_id AS s_e""")
+        self.assertEqual(references.columns, {
+            ("student", "student_id"), ("enrolled", "student_id"),
+            ("student", "grade"), ("enrolled", "grade")})
+        self.assertEqual(references.schema_uses, {"student", "enrolled"})
+
+    def test_nested_select(self):
+        references = self.references(
+            "SELECT c.x FROM (SELECT c.x FROM course AS c WHERE c.capacity < 2)")
+        self.assertEqual(references.columns, {("course", "x"), ("course", "capacity")})
+
+    def test_set_operation(self):
+        references = self.references("student UNION (SELECT e.grade FROM enrolled AS e)")
+        self.assertEqual(references.schema_uses, {"student"})
+        self.assertEqual(references.columns, {("enrolled", "grade")})
+
+
+class TestReferenceIndex(unittest.TestCase):
+    schema = (f"{student_create_table_statement}\n{enrolled_create_table_statement}\n"
+              f"{course_create_table_statement}")
+    queries = """SELECT s.name FROM student AS s WHERE s.gpa < 3;
+SELECT s_e.grade
+FROM student JOIN enrolled ON student.student_id = enrolled.student_id AS s_e;
+course;
+SELECT FROM"""
+
+    def index(self, path=None) -> ReferenceIndex:
+        index = ReferenceIndex(path)
+        index.add_file("schema.sql", TestReferenceIndex.schema)
+        index.add_file("queries.sql", TestReferenceIndex.queries)
+        return index
+
+    def test_lookup(self):
+        index = self.index()
+        self.assertEqual([str(location) for location in sorted(index.column_references("student", "gpa"))],
+                         ["queries.sql:1"])
+        self.assertEqual([str(location) for location in sorted(index.column_references("enrolled", "grade"))],
+                         ["queries.sql:2"])
+        # student has no grade column, it was only a candidate through the join
+        self.assertEqual(index.column_references("student", "grade"), set())
+        self.assertEqual({location.line for location in index.table_references("student")}, {1, 2})
+        self.assertIn("queries.sql", index.parse_errors)
+
+    def test_impact(self):
+        index = self.index()
+        changed = stmt.parse(
+            "CREATE TABLE student (student_id INT, name VARCHAR, year INT, "
+            "graduate BOOL, alumni BOOL, gpa VARCHAR)")
+        self.assertEqual({location.line for location in index.impact(changed)}, {1, 2})
+        added = stmt.parse("CREATE TABLE course (course_id INT, name VARCHAR, "
+                           "capacity INT, instructor VARCHAR, room INT)")
+        self.assertEqual({location.line for location in index.impact(added)}, {4})
+        same = stmt.parse(course_create_table_statement[:-1])
+        self.assertEqual(index.impact(same), set())
+
+    def test_reindex_changed_file(self):
+        index = self.index()
+        self.assertFalse(index.add_file("queries.sql", TestReferenceIndex.queries))
+        self.assertTrue(index.add_file("queries.sql", "course"))
+        self.assertEqual(index.table_references("student"), set())
+        self.assertNotIn("queries.sql", index.parse_errors)
+
+    def test_remove_file_keeps_other_files(self):
+        index = self.index()
+        index.add_file("other.sql", "SELECT s.gpa FROM student AS s;\n"
+                       "CREATE TABLE course (course_id INT)")
+        index.remove_file("queries.sql")
+        self.assertEqual([str(location) for location in index.column_references("student", "gpa")],
+                         ["other.sql:1"])
+        self.assertEqual(index.column_references("enrolled", "grade"), set())
+        index.remove_file("schema.sql")
+        # course was redefined by other.sql
+        self.assertEqual(set(index.definitions), {"course"})
+        self.assertNotIn("queries.sql", index.file_entries)
+
+    def test_persist(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "refs.idx")
+            self.index(path).save()
+            loaded = ReferenceIndex(path)
+            self.assertEqual(loaded.column_references("student", "gpa"),
+                             self.index().column_references("student", "gpa"))
+            self.assertFalse(loaded.add_file("schema.sql", TestReferenceIndex.schema))
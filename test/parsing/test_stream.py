@@ -0,0 +1,151 @@
+import io
+import os
+import tempfile
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.split import split_statements
+from src.parsing.statements import stmt_sequence, type_check_stmts
+from src.parsing.stream import (StatementParseError,
+                                iter_buffer_statement_texts,
+                                iter_buffer_statements, iter_statement_texts,
+                                iter_statements, map_file)
+from src.types.symbol_table import SymbolTable
+from src.types.types import RedefinedNameError, TypeMismatchError
+
+
+class TestIterStatementTexts(unittest.TestCase):
+    def assert_same_as_split(self, sql: str):
+        for chunk_size in [1, 2, 3, 7, 1 << 16]:
+            self.assertEqual(
+                list(iter_statement_texts(io.StringIO(sql), chunk_size)),
+                split_statements(sql))
+
+    def test_split(self):
+        self.assert_same_as_split("a; b ;c")
+        self.assert_same_as_split("a;")
+        self.assert_same_as_split("")
+
+    def test_string_literal(self):
+        self.assert_same_as_split('SELECT CONCAT(a.b, ";") FROM a; b')
+        self.assert_same_as_split('a "; b')
+        self.assert_same_as_split('"";";";x"y;"z;')
+
+    def test_buffer(self):
+        for sql in ["a; b ;c", "a;", "", 'SELECT CONCAT(a.b, ";") FROM a; b', 'a "; b']:
+            self.assertEqual(
+                list(iter_buffer_statement_texts(sql.encode())),
+                split_statements(sql))
+
+    def test_buffer_literals(self):
+        for sql in ['"";";";x"y;"z;', '";"', '"', 'a;"', ';";";', 'a";b"c;d']:
+            self.assertEqual(
+                list(iter_buffer_statement_texts(sql.encode())),
+                split_statements(sql))
+
+    def test_buffer_byte_offsets(self):
+        self.assertEqual(
+            list(iter_buffer_statement_texts('"é;"; b'.encode())),
+            [(0, '"é;"'), (6, " b")])
+
+
+class TestIterStatements(unittest.TestCase):
+    program = f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        {course_create_table_statement}
+        SELECT s.student_id FROM student AS s WHERE s.alumni = True"""
+
+    def test_same_ast(self):
+        expected = stmt_sequence.parse(TestIterStatements.program).stmts
+        for chunk_size in [5, 1 << 16]:
+            self.assertEqual(list(iter_statements(
+                io.StringIO(TestIterStatements.program), chunk_size)), expected)
+            self.assertEqual(list(iter_statements(
+                io.StringIO(TestIterStatements.program + ";\n"), chunk_size)), expected)
+
+    def test_type_check(self):
+        self.assertEqual(
+            type_check_stmts(iter_statements(io.StringIO(TestIterStatements.program)),
+                             SymbolTable()),
+            stmt_sequence.parse(TestIterStatements.program).type_check(SymbolTable()))
+
+    def test_error_position(self):
+        sql = "SELECT a.x FROM a;\n  SELECT a.x FROM WHERE;"
+        with self.assertRaises(StatementParseError) as cm:
+            list(iter_statements(io.StringIO(sql), 4))
+        self.assertEqual(cm.exception.offset, sql.index("FROM WHERE") + 5)
+        self.assertEqual(cm.exception.line_info(), "1:18")
+
+    def test_empty(self):
+        with self.assertRaises(StatementParseError):
+            list(iter_statements(io.StringIO("")))
+
+    def test_leading_whitespace(self):
+        # As with stmt_sequence, the first statement may only start with
+        # whitespace if it is a SELECT (in any case) or CREATE TABLE
+        for sql in ["\nSelect t.a FROM t", "t;\n u"]:
+            self.assertEqual(list(iter_statements(io.StringIO(sql))),
+                             stmt_sequence.parse(sql).stmts)
+        with self.assertRaises(StatementParseError):
+            list(iter_statements(io.StringIO("\n t")))
+
+    def test_stops_at_first_error(self):
+        class Lines(io.StringIO):
+            reads = 0
+
+            def read(self, size=-1):
+                self.reads += 1
+                return super().read(size)
+
+        # The type error is in the second statement, the syntax error in the
+        # third is never read
+        sql = (student_create_table_statement
+               + "SELECT s.student_id + s.name FROM student AS s;"
+               + "x" * 100 + "; SELECT")
+        f = Lines(sql)
+        with self.assertRaises(TypeMismatchError):
+            type_check_stmts(iter_statements(f, 16), SymbolTable())
+        self.assertLess(f.reads * 16, len(sql))
+
+
+class TestMapFile(unittest.TestCase):
+    def map_statements(self, sql: str):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "program.sql")
+            with open(path, "w") as f:
+                f.write(sql)
+            with map_file(path) as buffer:
+                return list(iter_buffer_statements(buffer))
+
+    def check_mapped(self, sql: str):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "program.sql")
+            with open(path, "w") as f:
+                f.write(sql)
+            with map_file(path) as buffer:
+                type_check_stmts(iter_buffer_statements(buffer), SymbolTable())
+
+    def test_error_unmaps(self):
+        # The mapping is closed while the statement generator is suspended
+        with self.assertRaises(RedefinedNameError):
+            self.check_mapped('CREATE TABLE a (x INT); CREATE TABLE a (x INT); "')
+        with self.assertRaises(StatementParseError):
+            self.check_mapped('CREATE TABLE a (x INT); CREATE; "')
+
+    def test_same_ast(self):
+        self.assertEqual(self.map_statements(TestIterStatements.program),
+                         stmt_sequence.parse(TestIterStatements.program).stmts)
+
+    def test_empty_file(self):
+        with self.assertRaises(StatementParseError):
+            self.map_statements("")
+
+    def test_error_offset_in_bytes(self):
+        sql = 'SELECT CONCAT(a.x, "é") FROM a;\nSELECT a.x FROM WHERE'
+        with self.assertRaises(StatementParseError) as cm:
+            list(iter_buffer_statements(sql.encode()))
+        self.assertEqual(cm.exception.offset,
+                         len(sql.encode()) - len("WHERE"))
+        self.assertEqual(cm.exception.line_info(), "1:16")
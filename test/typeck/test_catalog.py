@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.statements import stmt_sequence
+from src.types.catalog import (MappedCatalog, encode_catalog, open_catalog,
+                               write_catalog)
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, RedefinedNameError, Schema
+
+
+class TestMappedCatalog(unittest.TestCase):
+    tables = {
+        "b": Schema({"x": BaseType.INT, "y": BaseType.VARCHAR}),
+        "a": Schema({}),
+        "é": Schema({"ü": BaseType.BOOL}),
+        "c": Schema({"z": BaseType.BOOL}),
+    }
+
+    def test_round_trip(self):
+        catalog = MappedCatalog(encode_catalog(self.tables))
+        self.assertEqual(list(catalog), ["a", "b", "c", "é"])
+        self.assertEqual(len(catalog), 4)
+        self.assertEqual(dict(catalog), self.tables)
+        self.assertEqual(catalog["b"].names, ("x", "y"))
+        self.assertEqual(MappedCatalog(encode_catalog({})).data.count, 0)
+
+    def test_lazy(self):
+        catalog = MappedCatalog(encode_catalog(self.tables))
+        self.assertIn("c", catalog)
+        self.assertNotIn("d", catalog)
+        self.assertEqual(catalog.data.tables, {})
+        schema = catalog["c"]
+        self.assertIs(catalog["c"], schema)
+        self.assertEqual(list(catalog.data.tables), ["c"])
+        with self.assertRaises(KeyError):
+            catalog["d"]
+
+    def test_updates(self):
+        catalog = MappedCatalog(encode_catalog(self.tables))
+        child = catalog.child()
+        self.assertEqual(child["a"], self.tables["a"])
+        catalog["d"] = self.tables["a"]
+        del catalog["b"]
+        self.assertNotIn("b", catalog)
+        self.assertIn("d", child)
+        self.assertEqual(list(catalog), ["a", "c", "é", "d"])
+        catalog["b"] = self.tables["c"]
+        self.assertEqual(catalog["b"], self.tables["c"])
+
+    def test_type_check(self):
+        sql = " ".join([student_create_table_statement,
+                        enrolled_create_table_statement,
+                        course_create_table_statement])
+        st = SymbolTable()
+        stmt_sequence.parse(sql[:-1]).type_check(st)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "catalog")
+            write_catalog(path, st)
+            catalog = open_catalog(path)
+            query = "SELECT e.grade + 1 FROM enrolled AS e WHERE e.dropped"
+            self.assertEqual(stmt_sequence.parse(query).type_check(catalog),
+                             stmt_sequence.parse(query).type_check(st))
+            with self.assertRaises(RedefinedNameError):
+                stmt_sequence.parse(course_create_table_statement[:-1]).type_check(catalog)
+            catalog.data.buffer.close()
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            MappedCatalog(b"")
+        with self.assertRaises(ValueError):
+            MappedCatalog(b"SQLCATLX" + encode_catalog({})[8:])
+        with self.assertRaises(ValueError):
+            MappedCatalog(encode_catalog({})[:8] + b"\xff" * 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
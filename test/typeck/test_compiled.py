@@ -0,0 +1,120 @@
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.compiled import compile_expr, compile_query
+from src.parsing.expr import expr
+from src.parsing.query import query
+from src.parsing.statements import stmt_sequence
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, Expression, Schema
+
+queries = [
+    "student",
+    "student AS s",
+    "student AS enrolled",
+    "missing",
+    """SELECT s.student_id, CONCAT(s.name, "!"), s.year + -4 AS start_year, not s.graduate as undergraduate
+        FROM student AS s""",
+    "SELECT SUBSTR(s.name, 0, s.year), s.gpa * 2 FROM student AS s WHERE s.gpa < 3 AND s.alumni",
+    "SELECT s.name FROM student AS s WHERE s.gpa",
+    "SELECT s.name FROM student AS s WHERE s.name < s.gpa",
+    "SELECT s.name FROM student AS s WHERE s.graduate < s.alumni",
+    "SELECT CONCAT(s.gpa, s.missing) FROM student AS s",
+    "SELECT SUBSTR(s.name, s.name, s.missing) FROM student AS s",
+    "SELECT s.missing + s.name FROM student AS s",
+    "SELECT s.gpa = s.name FROM student AS s",
+    "SELECT e.student_id FROM student AS s",
+    "SELECT MIN(s.alumni), MAX(s.gpa), AVG(s.name) FROM student AS s",
+    "SELECT AVG(s.name) FROM student AS s",
+    "SELECT s.year, COUNT(s.student_id), AVG(s.gpa) AS avg_gpa FROM student AS s GROUP BY s.year",
+    "SELECT s.year, s.gpa FROM student AS s GROUP BY s.year",
+    "SELECT s.year FROM student AS s GROUP BY s.year HAVING s.gpa < 3",
+    "SELECT s.year FROM student AS s WHERE COUNT(s.gpa) < 3 GROUP BY s.year",
+    "SELECT COUNT(COUNT(s.gpa)) FROM student AS s GROUP BY s.year",
+    "SELECT s.year FROM student AS s GROUP BY s.missing",
+    "SELECT s.year AS y FROM student AS s WHERE s.y < 2 GROUP BY s.y HAVING COUNT(s.gpa) < s.y",
+    """SELECT s_e.student.student_id as s_id, s_e.course_id, s_e.grade
+        FROM student JOIN enrolled ON student.student_id = enrolled.student_id AS s_e""",
+    """(SELECT c.course_id, c.name FROM course AS c)
+        JOIN (SELECT e.course_id, e.grade from enrolled AS e)
+        ON c.course_id = e.course_id as c_e""",
+    "student AS s JOIN enrolled AS e ON s.gpa AS s_e",
+    "student AS s JOIN enrolled AS e ON e.grade < s.gpa AS s_e",
+    "student AS s JOIN enrolled AS e ON e.grade < course.capacity AS s_e",
+    """SELECT c_e.course.course_id as course_id, COUNT(c_e.student_id)
+        FROM (course JOIN enrolled on course.course_id = enrolled.course_id as c_e)
+        WHERE 5000 < c_e.course.course_id
+        GROUP BY c_e.course.course_id, c_e.capacity
+        HAVING COUNT(c_e.student_id) < (c_e.capacity + -10)""",
+    "student UNION student INTERSECT student",
+    "student UNION enrolled",
+    "(SELECT s.gpa FROM student AS s) UNION (SELECT e.grade FROM enrolled AS e) UNION missing",
+    "(SELECT s.gpa FROM student AS s) UNION (SELECT s.name FROM student AS s) UNION missing",
+]
+
+# Tenant variants of the catalog: the same tables with other column types
+# and columns
+variants = [
+    {},
+    {"student": {"gpa": BaseType.VARCHAR, "name": BaseType.INT}},
+    {"student": {"year": BaseType.BOOL}, "enrolled": {"grade": BaseType.VARCHAR}},
+    {"course": {"capacity": BaseType.VARCHAR, "name": BaseType.INT}},
+]
+
+
+def catalogs():
+    base = SymbolTable()
+    stmt_sequence.parse(f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        {course_create_table_statement[:-1]}""").type_check(base)
+    for changes in variants:
+        st = SymbolTable()
+        for table, schema in base.items():
+            fields = dict(schema.fields.items())
+            fields.update(changes.get(table, {}))
+            st[table] = Schema(fields)
+        yield st
+
+
+def outcome(type_check, st: SymbolTable):
+    try:
+        return type_check(st)
+    except Exception as e:
+        return (type(e), str(e))
+
+
+class TestCompiledQuery(unittest.TestCase):
+    def test_same_as_type_check(self):
+        for sql in queries:
+            ast = query.parse(sql)
+            program = compile_query(ast)
+            for i, st in enumerate(catalogs()):
+                with self.subTest(sql=sql, variant=i):
+                    self.assertEqual(outcome(program.type_check, st),
+                                     outcome(ast.type_check, st))
+
+    def test_reusable(self):
+        program = compile_query(query.parse(queries[4]))
+        results = [outcome(program.type_check, st) for st in catalogs()]
+        self.assertEqual(results, [outcome(program.type_check, st) for st in catalogs()])
+        self.assertNotEqual(results[0], results[1])
+
+
+class TestCompiledExpr(unittest.TestCase):
+    def test_same_as_type_check(self):
+        st = SymbolTable({"t": Schema({"a": BaseType.INT, "b": BaseType.VARCHAR})})
+        for sql in ["t.a", "1 + t.a * 2", "t.a = 1 AND NOT t.b < \"x\"",
+                    "CONCAT(t.b, t.b)", "NOT t.a", "t.a + t.c"]:
+            with self.subTest(sql=sql):
+                node = expr.parse(sql)
+                self.assertEqual(outcome(compile_expr(node).type_check, st),
+                                 outcome(node.type_check, st))
+
+    def test_repeated_column_one_slot(self):
+        program = compile_expr(expr.parse("t.a < 1 AND t.a < 2 AND t.b = t.b"))
+        self.assertEqual(program.columns, [("t", "a"), ("t", "b")])
+        st = SymbolTable({"t": Schema({"a": BaseType.INT, "b": BaseType.INT})})
+        self.assertEqual(program.type_check(st), Expression(
+            Schema({"t.a": BaseType.INT, "t.b": BaseType.INT}), BaseType.BOOL))
@@ -0,0 +1,93 @@
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.incremental import IncrementalChecker
+from src.parsing.statements import stmt_sequence
+from src.types.symbol_table import SymbolTable
+from src.types.types import (BaseType, RedefinedNameError, Schema,
+                             TypeMismatchError)
+
+
+class TestIncrementalChecker(unittest.TestCase):
+    tables = f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        {course_create_table_statement}"""
+    student_query = "SELECT s.student_id FROM student AS s WHERE s.alumni = True"
+    course_query = "SELECT c.name FROM course AS c"
+
+    def test_same_result(self):
+        program = f"{self.tables} {self.student_query}; {self.course_query}"
+        checker = IncrementalChecker()
+        self.assertEqual(
+            checker.check_text(program),
+            stmt_sequence.parse(program).type_check(SymbolTable())
+        )
+        self.assertEqual((checker.checked, checker.reused), (5, 0))
+        self.assertEqual(
+            checker.check_text(program),
+            stmt_sequence.parse(program).type_check(SymbolTable())
+        )
+        self.assertEqual((checker.checked, checker.reused), (0, 5))
+
+    def test_edit_last_query(self):
+        checker = IncrementalChecker()
+        checker.check_text(f"{self.tables} {self.student_query}")
+        self.assertEqual(
+            checker.check_text(f"{self.tables} {self.course_query}"),
+            ("c", Schema({"name": BaseType.VARCHAR}))
+        )
+        self.assertEqual((checker.checked, checker.reused), (1, 3))
+
+    def test_edit_table_rechecks_dependents(self):
+        checker = IncrementalChecker()
+        checker.check_text(
+            f"{self.tables} {self.student_query}; {self.course_query}")
+        checker.check_text(
+            f"""{student_create_table_statement}
+                {enrolled_create_table_statement}
+                CREATE TABLE course (course_id INT, name INT);
+                {self.student_query}; {self.course_query}""")
+        # The course table and the query reading it
+        self.assertEqual((checker.checked, checker.reused), (2, 3))
+        self.assertEqual(checker.records[-1].result,
+                         ("c", Schema({"name": BaseType.INT})))
+
+    def test_reorder_columns_rechecks_dependents(self):
+        checker = IncrementalChecker()
+        rest = "CREATE TABLE u (a INT, b VARCHAR); t UNION u"
+        checker.check_text(f"CREATE TABLE t (a INT, b VARCHAR); {rest}")
+        edited = f"CREATE TABLE t (b VARCHAR, a INT); {rest}"
+        with self.assertRaises(TypeMismatchError):
+            checker.check_text(edited)
+        self.assertEqual((checker.checked, checker.reused), (2, 1))
+        with self.assertRaises(TypeMismatchError):
+            stmt_sequence.parse(edited).type_check(SymbolTable())
+
+    def test_insert_statement(self):
+        checker = IncrementalChecker()
+        checker.check_text(f"{self.tables} {self.course_query}")
+        checker.check_text(
+            f"CREATE TABLE other (id INT); {self.tables} {self.course_query}")
+        self.assertEqual((checker.checked, checker.reused), (1, 4))
+
+    def test_new_name_conflicts_with_alias(self):
+        checker = IncrementalChecker()
+        checker.check_text(f"{self.tables} {self.course_query}")
+        with self.assertRaises(RedefinedNameError):
+            checker.check_text(
+                f"{self.tables} CREATE TABLE c (id INT); {self.course_query}")
+        self.assertEqual(checker.check_text(f"{self.tables} {self.course_query}"),
+                         ("c", Schema({"name": BaseType.VARCHAR})))
+
+    def test_error_then_fix(self):
+        checker = IncrementalChecker()
+        with self.assertRaises(KeyError):
+            checker.check_text(f"{self.course_query}; {self.student_query}")
+        self.assertEqual(
+            checker.check_text(
+                f"{self.tables} {self.course_query}; {self.student_query}"),
+            ("s", Schema({"student_id": BaseType.INT}))
+        )
+        self.assertEqual((checker.checked, checker.reused), (5, 0))
@@ -0,0 +1,47 @@
+import unittest
+from test.typeck.test_compiled import catalogs, outcome, queries
+
+from src.parsing.many import CatalogResult, type_check_many
+from src.parsing.query import query
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, Schema
+
+
+def result_outcome(catalog_result: CatalogResult):
+    if catalog_result.error is not None:
+        return (type(catalog_result.error), str(catalog_result.error))
+    return catalog_result.result
+
+
+class TestTypeCheckMany(unittest.TestCase):
+    def test_same_as_type_check(self):
+        # Every variant twice, so that results are shared
+        batch = list(catalogs()) + list(catalogs())
+        for sql in queries:
+            ast = query.parse(sql)
+            with self.subTest(sql=sql):
+                self.assertEqual(
+                    [result_outcome(r) for r in type_check_many(ast, batch)],
+                    [outcome(ast.type_check, st) for st in batch])
+
+    def test_shared_per_variant(self):
+        a = Schema({"x": BaseType.INT})
+        b = Schema({"x": BaseType.VARCHAR})
+        batch = [SymbolTable({"t": Schema(dict(schema.fields.items()))})
+                 for schema in [a, b, a, a, b]]
+        results = type_check_many(query.parse("SELECT t.x + 1 FROM t"), batch)
+        self.assertIs(results[0], results[2])
+        self.assertIs(results[0], results[3])
+        self.assertIs(results[1], results[4])
+        self.assertIsNone(results[0].error)
+        self.assertIsNotNone(results[1].error)
+
+    def test_names_matter(self):
+        schema = Schema({"x": BaseType.INT})
+        batch = [SymbolTable({"t": schema}), SymbolTable({"t": schema, "tt_tt": schema}),
+                 SymbolTable({"t": schema, "u": schema})]
+        results = type_check_many(query.parse("t UNION t"), batch)
+        self.assertEqual([r.result[0] for r in results], ["tt_tt", "tt_tt_0", "tt_tt"])
+        results = type_check_many(query.parse("t AS u"), batch)
+        self.assertIsNone(results[1].error)
+        self.assertIsNotNone(results[2].error)
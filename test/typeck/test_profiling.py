@@ -0,0 +1,64 @@
+import io
+import unittest
+from test.e2e.tables import (enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.expr import Expr, ExprColumn
+from src.parsing.statements import stmt_sequence, type_check_stmts
+from src.parsing.stream import iter_statements
+from src.profiling import Profiler
+from src.types.symbol_table import SymbolTable
+from src.types.types import RedefinedNameError, Schema
+
+
+class TestProfiler(unittest.TestCase):
+    program = f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        SELECT s_e.s.student_id, COUNT(s_e.grade)
+        FROM (student AS s JOIN enrolled AS e ON s.student_id = e.student_id AS s_e)
+        GROUP BY s_e.s.student_id"""
+
+    def test_same_result(self):
+        with Profiler() as profiler:
+            result = profiler.type_check(
+                iter_statements(io.StringIO(TestProfiler.program)), SymbolTable())
+        self.assertEqual(result, type_check_stmts(
+            iter_statements(io.StringIO(TestProfiler.program)), SymbolTable()))
+
+    def test_statement_timings(self):
+        with Profiler() as profiler:
+            profiler.type_check(iter_statements(io.StringIO(TestProfiler.program)),
+                                SymbolTable())
+        self.assertEqual([timing.kind for timing in profiler.statements],
+                         ["StmtCreateTable", "StmtCreateTable", "StmtQuery"])
+        self.assertEqual(profiler.phases["parse"].calls, 3)
+        self.assertEqual(profiler.phases["type_check"].calls, 3)
+        for name in ["Schema.concat", "Schema.expand", "Schema.simplify",
+                     "Expr.aggregation_status", "column resolution", "table lookup"]:
+            self.assertGreater(profiler.phases[name].calls, 0, name)
+        self.assertIn("StmtQuery", profiler.report())
+
+    def test_error_keeps_timings(self):
+        program = f"{student_create_table_statement} {student_create_table_statement}"
+        with Profiler() as profiler:
+            with self.assertRaises(RedefinedNameError):
+                profiler.type_check(stmt_sequence.parse(program).stmts, SymbolTable())
+        self.assertEqual(len(profiler.statements), 2)
+
+    def test_timer_nested(self):
+        profiler = Profiler()
+        with profiler.timer("outer"):
+            with profiler.timer("outer"):
+                pass
+        self.assertEqual(profiler.phases["outer"].calls, 2)
+
+    def test_uninstalled(self):
+        originals = [Schema.__dict__["concat"], Schema.__dict__["expand"],
+                     Expr.__dict__["aggregation_status"],
+                     ExprColumn.__dict__["type_check"], SymbolTable.__dict__["__getitem__"]]
+        with Profiler():
+            self.assertIsNot(Schema.__dict__["expand"], originals[1])
+        self.assertEqual([Schema.__dict__["concat"], Schema.__dict__["expand"],
+                          Expr.__dict__["aggregation_status"],
+                          ExprColumn.__dict__["type_check"],
+                          SymbolTable.__dict__["__getitem__"]], originals)
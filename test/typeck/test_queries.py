@@ -770,3 +770,53 @@ class TestQueryIntersectUnion(unittest.TestCase):
             }))
 
         )
+
+
+class TestSetOperationBranches(unittest.TestCase):
+    schema = Schema({"ssn": BaseType.INT, "gpa": BaseType.INT})
+
+    def test_each_branch_checked_once(self):
+        calls = []
+
+        class CountingTable(QueryTable):
+            def type_check(self, st):
+                calls.append(self.table_name)
+                return super().type_check(st)
+
+        query = CountingTable("a")
+        for _ in range(20):
+            query = QueryUnion([QueryIntersect([query, CountingTable("b")]),
+                                CountingTable("c")])
+        query.type_check(SymbolTable({"a": self.schema, "b": self.schema,
+                                      "c": self.schema}))
+        self.assertEqual(len(calls), 41)
+
+    def test_merge_all(self):
+        other = Schema({"x": BaseType.INT, "y": BaseType.INT})
+        self.assertEqual(
+            Schema.merge_all([self.schema, other, self.schema]),
+            Schema.merge_fields(Schema.merge_fields(self.schema, other), self.schema))
+        self.assertEqual(list(Schema.merge_all([self.schema, other, self.schema]).fields),
+                         ["ssn_x_ssn", "gpa_y_gpa"])
+
+
+class TestSetOperationNames(unittest.TestCase):
+    schema = Schema({"ssn": BaseType.INT})
+
+    def test_colliding_names(self):
+        st = SymbolTable({"students": self.schema, "ss_ss": self.schema})
+        for i in range(3000):
+            st[f"ss_ss_{i}"] = self.schema
+        union = QueryUnion([QueryTable("students"), QueryTable("students")])
+        for _ in range(1000):
+            self.assertEqual(union.type_check(st)[0], "ss_ss_3000")
+        st["ss_ss_3000"] = self.schema
+        self.assertEqual(union.type_check(st)[0], "ss_ss_3001")
+        del st["ss_ss_5"]
+        self.assertEqual(union.type_check(st)[0], "ss_ss_5")
+
+    def test_fresh_name(self):
+        st = SymbolTable({"a": self.schema, "a_0": self.schema})
+        self.assertEqual(st.fresh_name("b"), "b")
+        self.assertEqual(st.fresh_name("a"), "a_1")
+        self.assertEqual(st.fresh_name("a"), "a_1")
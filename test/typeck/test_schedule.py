@@ -0,0 +1,124 @@
+import io
+import os
+import tempfile
+import unittest
+from test.e2e.tables import (course_create_table_statement,
+                             enrolled_create_table_statement,
+                             student_create_table_statement)
+
+from src.parsing.cache import ParseCache
+from src.parsing.statements import type_check_stmts
+from src.parsing.stream import StatementParseError, iter_statements
+from src.schedule import statement_access, type_check_parallel
+from src.types.catalog import open_catalog, write_catalog
+from src.types.symbol_table import SymbolTable
+
+
+def outcome(check, stmts, st):
+    try:
+        return check(stmts, st), dict(st)
+    except Exception as e:
+        return (type(e), str(e)), dict(st)
+
+
+class TestStatementAccess(unittest.TestCase):
+    def test_access(self):
+        stmts = ParseCache().parse(
+            "CREATE TABLE t (x INT);"
+            "SELECT a.x FROM t AS a JOIN u ON a.x = u.x AS j;"
+            "t UNION t").stmts
+        self.assertEqual((statement_access(stmts[0]).reads,
+                          statement_access(stmts[0]).writes), ({"t"}, {"t"}))
+        self.assertEqual(statement_access(stmts[1]).reads, {"t", "a", "u"})
+        self.assertEqual(statement_access(stmts[1]).writes, set())
+        self.assertFalse(statement_access(stmts[1]).reads_all)
+        self.assertTrue(statement_access(stmts[2]).reads_all)
+
+
+class TestTypeCheckParallel(unittest.TestCase):
+    tables = f"""{student_create_table_statement}
+        {enrolled_create_table_statement}
+        {course_create_table_statement}"""
+    programs = [
+        tables,
+        f"""{tables}
+        SELECT s.student_id FROM student AS s WHERE s.alumni = True;
+        SELECT e.grade + 1 FROM enrolled AS e""",
+        f"""{tables}
+        SELECT s.student_id FROM student AS s WHERE s.alumni = 1;
+        SELECT e.grade FROM enrolled AS e WHERE e.grade;
+        CREATE TABLE late (x INT)""",
+        f"""{tables}
+        SELECT l.x FROM late AS l;
+        CREATE TABLE late (x INT);
+        SELECT l.x FROM late AS l""",
+        f"""{tables}
+        SELECT e.grade + 1 FROM enrolled AS e;
+        CREATE TABLE student (x INT);
+        SELECT s.x FROM student AS s""",
+        f"""{tables}
+        CREATE TABLE tt (x INT);
+        tt UNION tt;
+        CREATE TABLE tt_tt (x INT);
+        tt UNION tt""",
+    ]
+
+    def test_same_as_sequence(self):
+        cache = ParseCache()
+        for program in TestTypeCheckParallel.programs:
+            stmts = cache.parse(program).stmts
+            expected = outcome(lambda stmts, st: cache.parse(program).type_check(st),
+                               stmts, SymbolTable())
+            for jobs in [1, 2]:
+                with self.subTest(program=program, jobs=jobs):
+                    self.assertEqual(
+                        outcome(lambda stmts, st: type_check_parallel(stmts, st, jobs),
+                                stmts, SymbolTable()),
+                        expected)
+
+    def test_catalog(self):
+        st = SymbolTable()
+        ParseCache().parse(TestTypeCheckParallel.tables).type_check(st)
+        stmts = ParseCache().parse(
+            "SELECT c.course_id FROM course AS c;"
+            "SELECT s.student_id FROM student AS s").stmts
+        expected = ParseCache().parse(
+            "SELECT s.student_id FROM student AS s").type_check(SymbolTable(dict(st)))
+        self.assertEqual(type_check_parallel(iter(stmts), st, 2), expected)
+
+    def test_catalog_file(self):
+        st = SymbolTable()
+        ParseCache().parse(TestTypeCheckParallel.tables).type_check(st)
+        with tempfile.TemporaryDirectory() as directory:
+            catalog_path = os.path.join(directory, "schema.catalog")
+            write_catalog(catalog_path, st)
+            stmts = ParseCache().parse(
+                "SELECT c.course_id FROM course AS c;"
+                "SELECT s.student_id FROM student AS s").stmts
+            self.assertEqual(
+                type_check_parallel(stmts, open_catalog(catalog_path), 2, catalog_path),
+                type_check_parallel(stmts, st, 2))
+
+    def test_lazy_parse_error(self):
+        # The syntax error is only raised when the third statement is read,
+        # after the query before it was sent to a worker
+        sql = "CREATE TABLE t (a INT); SELECT t.missing FROM t; SELECT FROM WHERE;"
+        expected = outcome(type_check_stmts, iter_statements(io.StringIO(sql)),
+                           SymbolTable())
+        self.assertEqual(expected[0][0], KeyError)
+        for jobs in [1, 2]:
+            with self.subTest(jobs=jobs):
+                self.assertEqual(
+                    outcome(lambda stmts, st: type_check_parallel(stmts, st, jobs),
+                            iter_statements(io.StringIO(sql)), SymbolTable()),
+                    expected)
+        # The tables created before the syntax error are kept
+        sql = "CREATE TABLE t (a INT); SELECT t.a FROM t; SELECT FROM WHERE;"
+        st = SymbolTable()
+        with self.assertRaises(StatementParseError):
+            type_check_parallel(iter_statements(io.StringIO(sql)), st, 2)
+        self.assertEqual(set(st), {"t"})
+
+
+if __name__ == "__main__":
+    unittest.main()
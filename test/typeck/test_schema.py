@@ -0,0 +1,71 @@
+import pickle
+import unittest
+
+from src.types.types import (BaseType, Schema, SchemaConcatConflictError,
+                             expand_stats, simplify_stats)
+
+
+class TestSchema(unittest.TestCase):
+    schema = Schema({"ssn": BaseType.INT, "graduate": BaseType.BOOL})
+
+    def test_fields(self):
+        self.assertEqual(self.schema.fields["ssn"], BaseType.INT)
+        self.assertEqual(list(self.schema.fields), ["ssn", "graduate"])
+        self.assertEqual(dict(self.schema.fields.items()),
+                         {"ssn": BaseType.INT, "graduate": BaseType.BOOL})
+        self.assertIn("graduate", self.schema.fields)
+        with self.assertRaises(KeyError):
+            self.schema.fields["gpa"]
+
+    def test_equality_ignores_order(self):
+        reordered = Schema({"graduate": BaseType.BOOL, "ssn": BaseType.INT})
+        self.assertEqual(self.schema, reordered)
+        self.assertEqual(hash(self.schema), hash(reordered))
+        self.assertNotEqual(self.schema, Schema({"ssn": BaseType.INT}))
+        self.assertNotEqual(self.schema, Schema(
+            {"ssn": BaseType.BOOL, "graduate": BaseType.BOOL}))
+
+    def test_pickle(self):
+        self.assertEqual(pickle.loads(pickle.dumps(self.schema)), self.schema)
+
+    def test_expand_interns_names(self):
+        first = self.schema.expand("students")
+        second = self.schema.expand("students")
+        self.assertEqual(first, Schema(
+            {"students.ssn": BaseType.INT, "students.graduate": BaseType.BOOL}))
+        for first_name, second_name in zip(first.names, second.names):
+            self.assertIs(first_name, second_name)
+
+    def test_concat(self):
+        self.assertIs(Schema.concat(self.schema, Schema({})), self.schema)
+        self.assertEqual(
+            Schema.concat(self.schema, Schema({"ssn": BaseType.INT, "gpa": BaseType.INT})),
+            Schema({"ssn": BaseType.INT, "graduate": BaseType.BOOL, "gpa": BaseType.INT}))
+        self.assertEqual(
+            list(Schema.concat(self.schema, self.schema, keep_all=True).fields),
+            ["ssn_1", "graduate_1", "ssn_2", "graduate_2"])
+        with self.assertRaises(SchemaConcatConflictError):
+            Schema.concat(self.schema, Schema({"ssn": BaseType.BOOL}))
+
+    def test_simplify(self):
+        schema = Schema({"a.x": BaseType.INT, "b.x": BaseType.INT, "b.y": BaseType.BOOL})
+        self.assertEqual(list(schema.simplify().fields), ["a.x", "b.x", "y"])
+
+
+class TestSchemaCache(unittest.TestCase):
+    def test_expand_cached(self):
+        schema = Schema({"ssn": BaseType.INT})
+        expand_stats.reset()
+        first = schema.expand("students")
+        self.assertIs(schema.expand("students"), first)
+        self.assertEqual(schema.expand("s"), Schema({"s.ssn": BaseType.INT}))
+        self.assertEqual((expand_stats.hits, expand_stats.misses), (1, 2))
+        self.assertAlmostEqual(expand_stats.hit_rate(), 1 / 3)
+
+    def test_simplify_cached(self):
+        schema = Schema({"students.ssn": BaseType.INT})
+        simplify_stats.reset()
+        first = schema.simplify()
+        self.assertIs(schema.simplify(), first)
+        self.assertEqual(first, Schema({"ssn": BaseType.INT}))
+        self.assertEqual((simplify_stats.hits, simplify_stats.misses), (1, 1))
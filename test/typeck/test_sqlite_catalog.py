@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.types.sqlite_catalog import (base_type, is_sqlite_file,
+                                      load_sqlite_catalog)
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, RedefinedNameError, Schema
+
+
+class TestSqliteCatalog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "schema.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create(self, *ddl: str):
+        connection = sqlite3.connect(self.path)
+        for statement in ddl:
+            connection.execute(statement)
+        connection.commit()
+        connection.close()
+
+    def test_base_type(self):
+        self.assertEqual(base_type("INTEGER"), BaseType.INT)
+        self.assertEqual(base_type("bigint"), BaseType.INT)
+        self.assertEqual(base_type("VARCHAR(20)"), BaseType.VARCHAR)
+        self.assertEqual(base_type("TEXT"), BaseType.VARCHAR)
+        self.assertEqual(base_type("BOOLEAN"), BaseType.BOOL)
+        # INT is matched first, as by SQLite
+        self.assertEqual(base_type("POINT"), BaseType.INT)
+        for declared_type in ["REAL", "DOUBLE", "BLOB", "", "DECIMAL(10,2)"]:
+            self.assertIsNone(base_type(declared_type))
+
+    def test_load(self):
+        self.create("CREATE TABLE student (student_id INTEGER PRIMARY KEY,"
+                    " name TEXT, alumni BOOLEAN, gpa INT)",
+                    "CREATE TABLE course (course_id INT, name VARCHAR(40))",
+                    "CREATE INDEX course_name ON course (name)",
+                    "CREATE VIEW names AS SELECT name FROM student")
+        self.assertTrue(is_sqlite_file(self.path))
+        st = load_sqlite_catalog(self.path)
+        self.assertEqual(dict(st), {
+            "student": Schema({"student_id": BaseType.INT, "name": BaseType.VARCHAR,
+                               "alumni": BaseType.BOOL, "gpa": BaseType.INT}),
+            "course": Schema({"course_id": BaseType.INT, "name": BaseType.VARCHAR}),
+        })
+        # In creation order, with the columns in declaration order
+        self.assertEqual(list(st), ["student", "course"])
+        self.assertEqual(st["student"].names, ("student_id", "name", "alumni", "gpa"))
+
+    def test_unsupported(self):
+        self.create("CREATE TABLE t (x INT, y REAL)")
+        with self.assertRaisesRegex(ValueError, "t.y: unsupported type REAL"):
+            load_sqlite_catalog(self.path)
+
+    def test_redefined(self):
+        self.create("CREATE TABLE t (x INT)")
+        st = SymbolTable({"t": Schema({})})
+        with self.assertRaises(RedefinedNameError):
+            load_sqlite_catalog(self.path, st)
+
+    def test_missing(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            load_sqlite_catalog(self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
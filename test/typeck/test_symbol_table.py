@@ -0,0 +1,40 @@
+import unittest
+
+from src.types.symbol_table import SymbolTable
+from src.types.types import BaseType, Schema
+
+
+class TestSymbolTable(unittest.TestCase):
+    a = Schema({"x": BaseType.INT})
+    b = Schema({"y": BaseType.BOOL})
+
+    def test_no_shared_default(self):
+        first = SymbolTable()
+        first["a"] = self.a
+        self.assertNotIn("a", SymbolTable())
+
+    def test_child_scope(self):
+        parent = SymbolTable({"a": self.a})
+        child = parent.child()
+        child["b"] = self.b
+        self.assertIs(child["a"], self.a)
+        self.assertIs(child["b"], self.b)
+        self.assertIn("a", child)
+        self.assertNotIn("b", parent)
+        self.assertEqual(list(child), ["b", "a"])
+        self.assertEqual(len(child), 2)
+        self.assertEqual(dict(child), {"a": self.a, "b": self.b})
+        with self.assertRaises(KeyError):
+            child["c"]
+
+    def test_shadowing(self):
+        parent = SymbolTable({"a": self.a})
+        child = parent.child({"a": self.b})
+        grandchild = child.child()
+        self.assertIs(grandchild["a"], self.b)
+        self.assertIs(parent["a"], self.a)
+        self.assertEqual(len(grandchild), 1)
+
+    def test_fresh_name_sees_parent(self):
+        child = SymbolTable({"a": self.a, "a_0": self.a}).child()
+        self.assertEqual(child.fresh_name("a"), "a_1")